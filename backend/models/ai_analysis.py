@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+# Structured outputs requested from the LLM via JSON schema (response_format)
+
+class TransactionRiskOutput(BaseModel):
+    risk_level: Literal["low", "medium", "high", "critical"]
+    risk_score: float = Field(description="0-100")
+    anomaly_detected: bool
+    insights: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    fraud_indicators: List[str] = Field(default_factory=list)
+    summary: str
+
+class BatchTransactionRiskOutput(TransactionRiskOutput):
+    index: int
+
+class BatchTransactionRiskResults(BaseModel):
+    results: List[BatchTransactionRiskOutput]
+
+class WalletInsightsOutput(BaseModel):
+    spending_patterns: List[str] = Field(default_factory=list)
+    financial_health_score: float = Field(description="0-100")
+    recommendations: List[str] = Field(default_factory=list)
+    trends: List[str] = Field(default_factory=list)
+    optimization_tips: List[str] = Field(default_factory=list)
+    summary: str = ""
+
+class FraudPatternOutput(BaseModel):
+    alert_level: Literal["none", "low", "medium", "high", "critical"]
+    unusual_patterns: List[str] = Field(default_factory=list)
+    fraud_indicators: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    summary: str
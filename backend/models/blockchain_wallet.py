@@ -3,6 +3,10 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
 
+from ..services.currency_units import Planck
+
+MAX_BATCH_ITEMS = 1000  # per API request; each item becomes one call in a single batch extrinsic
+
 class BlockchainWalletBalance(BaseModel):
     """Enhanced wallet balance with blockchain integration"""
     user_id: str
@@ -15,7 +19,7 @@ class BlockchainWalletBalance(BaseModel):
     recent_transactions: List[Dict[str, Any]] = Field(default_factory=list)
     
     # Blockchain-specific fields
-    balance_planck: Optional[int] = Field(description="Balance in smallest chain unit")
+    balance_planck: Optional[Planck] = Field(description="Balance in smallest chain unit")
     nonce: Optional[int] = Field(default=0, description="Account nonce")
     is_on_chain: bool = Field(default=True, description="Whether account exists on chain")
     
@@ -28,7 +32,7 @@ class BlockchainTransaction(BaseModel):
     block_hash: Optional[str] = Field(description="Hash of the block")
     transaction_type: str = Field(description="mint, burn, transfer, spend")
     amount_hp: float
-    amount_planck: Optional[int] = Field(description="Amount in planck units")
+    amount_planck: Optional[Planck] = Field(description="Amount in planck units")
     from_address: Optional[str] = Field(description="Sender blockchain address")
     to_address: Optional[str] = Field(description="Recipient blockchain address")
     status: str = Field(default="pending", description="pending, confirmed, failed, finalized")
@@ -86,6 +90,28 @@ class P2PTransferRequest(BaseModel):
     description: Optional[str] = Field(default="P2P Transfer")
     include_message: Optional[str] = None
     
+class BatchMintItem(BaseModel):
+    """Single recipient of a batch mint"""
+    user_id: str
+    amount_hp: float = Field(gt=0, le=10000, description="Amount must be positive and within the mint limit")
+    reference_id: Optional[str] = None
+
+class BatchMintRequest(BaseModel):
+    """Request model for batch mints (airdrops, campaign payouts, cashback)"""
+    mints: List[BatchMintItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+    reference_id: Optional[str] = None
+
+class BatchTransferItem(BaseModel):
+    """Single recipient of a batch transfer"""
+    to_user_id: str
+    amount_hp: float = Field(gt=0, description="Amount must be positive")
+    description: Optional[str] = None
+
+class BatchTransferRequest(BaseModel):
+    """Request model for one-to-many transfers"""
+    from_user_id: str
+    transfers: List[BatchTransferItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+    
 class PaymentRequest(BaseModel):
     """Request model for payments to merchants/services"""
     user_id: str
@@ -124,7 +150,7 @@ class AddressInfo(BaseModel):
     public_key: str
     network: str
     balance_hp: float
-    balance_planck: int
+    balance_planck: Planck
     nonce: int
     is_active: bool
     created_at: datetime
@@ -3,12 +3,15 @@ from typing import Optional, Dict, List, Any
 from datetime import datetime
 import uuid
 
+from ..services.currency_units import Planck, planck_to_hp, planck_to_inr
+
 class HappyPaisaTransaction(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     type: str  # "credit" or "debit"
     amount_hp: float
     amount_inr: float = Field(default=0.0)  # Calculated as amount_hp * 1000
+    amount_planck: Planck = Field(default=0)  # Exact amount; amount_hp/amount_inr are display copies
     description: str
     category: str  # "Food", "Travel", "Recharge", "Shopping", etc.
     status: str = "completed"  # "pending", "completed", "failed"
@@ -18,10 +21,17 @@ class HappyPaisaTransaction(BaseModel):
 class HappyPaisaWallet(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
-    balance_hp: float = 0.0
-    balance_inr_equiv: float = 0.0  # Always balance_hp * 1000
+    balance_planck: Planck = 0  # Exact balance (1 HP = 10^12 planck), stored as Decimal128
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    @property
+    def balance_hp(self) -> float:
+        return planck_to_hp(self.balance_planck)
+    
+    @property
+    def balance_inr_equiv(self) -> float:
+        return planck_to_inr(self.balance_planck)
 
 class WalletTransaction(BaseModel):
     user_id: str
@@ -35,6 +45,7 @@ class WalletBalance(BaseModel):
     user_id: str
     balance_hp: float = Field(description="Happy Paisa balance")
     balance_inr_equiv: float = Field(description="INR equivalent (1 HP = 1000 INR)")
+    balance_planck: Planck = Field(default=0, description="Exact balance in planck (1 HP = 10^12 planck)")
     last_updated: datetime = Field(default_factory=datetime.utcnow)
     spending_breakdown: Dict[str, float] = Field(default_factory=dict)
     recent_transactions: List[Dict[str, Any]] = Field(default_factory=list)
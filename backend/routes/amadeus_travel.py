@@ -3,6 +3,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, date
 from pydantic import BaseModel, Field
 from ..services.amadeus_service import amadeus_service
+from ..services.amadeus_search_cache import amadeus_search_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -379,6 +380,22 @@ async def amadeus_health_check():
             "timestamp": datetime.now().isoformat()
         }
 
+# Search Cache Stats
+@router.get("/cache/stats")
+async def amadeus_cache_stats():
+    """
+    📊 Flight and hotel search cache hit rates, background refreshes and Amadeus quota usage
+    """
+    return amadeus_search_cache.get_stats()
+
+# Transport Stats
+@router.get("/transport/stats")
+async def amadeus_transport_stats():
+    """
+    🔌 OAuth token state and per-endpoint request counts of the async Amadeus transport
+    """
+    return amadeus_service.transport.get_stats()
+
 # Popular Routes Endpoint
 @router.get("/flights/popular-routes")
 async def get_popular_routes():
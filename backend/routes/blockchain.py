@@ -1,12 +1,17 @@
 """
 Blockchain API Routes - Happy Paisa Blockchain Operations
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List, Optional
-from datetime import datetime
+import json
 
 from ..services.blockchain_gateway_service import blockchain_gateway, TransactionType, TransactionStatus
+from ..services.chain_event_service import BLOCKS_TOPIC, tx_topic, address_topic
+from ..services.reconciliation_service import ledger_reconciliation
 from ..models.user import User
+from ..models.blockchain_wallet import BatchMintRequest, BatchTransferRequest
 
 router = APIRouter(prefix="/api/blockchain", tags=["blockchain"])
 
@@ -132,6 +137,51 @@ async def transfer_happy_paisa(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to transfer Happy Paisa: {str(e)}")
 
+@router.post("/batch/mint")
+async def batch_mint_happy_paisa(request: BatchMintRequest):
+    """Mint Happy Paisa for many users in a single batch extrinsic"""
+    try:
+        result = await blockchain_gateway.batch_mint_happy_paisa(
+            [mint.dict() for mint in request.mints], request.reference_id
+        )
+        
+        return {
+            "success": True,
+            "message": f"Minted {result['total_amount_hp']} HP for {result['count']} users",
+            **result,
+            "amount_inr": result["total_amount_hp"] * 1000,
+            "network": "happy-paisa-mainnet"
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to batch mint Happy Paisa: {str(e)}")
+
+@router.post("/batch/transfer")
+async def batch_transfer_happy_paisa(request: BatchTransferRequest):
+    """Transfer Happy Paisa from one user to many recipients in a single batch extrinsic"""
+    try:
+        if any(transfer.to_user_id == request.from_user_id for transfer in request.transfers):
+            raise HTTPException(status_code=400, detail="Cannot transfer to same user")
+        
+        result = await blockchain_gateway.batch_transfer_happy_paisa(
+            request.from_user_id, [transfer.dict() for transfer in request.transfers]
+        )
+        
+        return {
+            "success": True,
+            "message": f"Transferred {result['total_amount_hp']} HP from {request.from_user_id} to {result['count']} recipients",
+            **result,
+            "from_user_id": request.from_user_id,
+            "network": "happy-paisa-mainnet"
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to batch transfer Happy Paisa: {str(e)}")
+
 @router.get("/transaction/{tx_hash}")
 async def get_transaction_status(tx_hash: str):
     """Get blockchain transaction status"""
@@ -143,6 +193,16 @@ async def get_transaction_status(tx_hash: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get transaction status: {str(e)}")
 
+@router.get("/transaction/{tx_hash}/proof")
+async def get_inclusion_proof(tx_hash: str):
+    """Merkle inclusion proof for a confirmed transaction (a few hundred bytes instead of full history)"""
+    try:
+        return await blockchain_gateway.get_inclusion_proof(tx_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build inclusion proof: {str(e)}")
+
 @router.get("/user/{user_id}/transactions")
 async def get_user_transactions(
     user_id: str,
@@ -173,24 +233,43 @@ async def sync_transaction_status(tx_hash: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to sync transaction: {str(e)}")
 
+@router.post("/reconciliation/run")
+async def run_reconciliation():
+    """Reconcile chain and wallet ledger activity since the last checkpoint"""
+    try:
+        return await ledger_reconciliation.run()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to run reconciliation: {str(e)}")
+
+@router.get("/reconciliation/status")
+async def get_reconciliation_status():
+    """Reconciliation checkpoint and backlog"""
+    try:
+        return await ledger_reconciliation.get_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get reconciliation status: {str(e)}")
+
+@router.get("/reconciliation/discrepancies")
+async def get_reconciliation_discrepancies(
+    status: str = Query(default="open", pattern="^(open|resolved)$"),
+    limit: int = Query(default=100, le=1000)
+):
+    """Users whose chain and wallet ledger net movements disagree"""
+    try:
+        discrepancies = await ledger_reconciliation.get_discrepancies(status, limit)
+        return {
+            "discrepancies": discrepancies,
+            "count": len(discrepancies),
+            "network": "happy-paisa-mainnet"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get reconciliation discrepancies: {str(e)}")
+
 @router.get("/explorer/latest-blocks")
 async def get_latest_blocks(limit: int = Query(default=10, le=50)):
-    """Get latest blocks information (simplified for demo)"""
+    """Get latest sealed blocks"""
     try:
-        chain_info = await blockchain_gateway.get_chain_status()
-        current_block = chain_info["chain_info"]["currentBlock"]
-        
-        # Generate mock block data
-        blocks = []
-        for i in range(limit):
-            block_number = current_block - i
-            blocks.append({
-                "block_number": block_number,
-                "block_hash": f"0x{block_number:064x}",
-                "timestamp": datetime.utcnow().isoformat(),
-                "transactions_count": 3 + (block_number % 10),
-                "validator": "5FHneW46xGXgs5mUiveU4sbTyGBzmstUspZC92UhjJM694ty"
-            })
+        blocks = await blockchain_gateway.get_latest_blocks(limit)
         
         return {
             "latest_blocks": blocks,
@@ -199,46 +278,114 @@ async def get_latest_blocks(limit: int = Query(default=10, le=50)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get latest blocks: {str(e)}")
 
+@router.get("/explorer/block/{block_id}")
+async def get_block(block_id: str):
+    """Get a block by number or hash"""
+    try:
+        block = await blockchain_gateway.chain.get_block(block_id)
+        if not block:
+            raise HTTPException(status_code=404, detail=f"Block {block_id} not found")
+        return block.to_dict()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get block: {str(e)}")
+
 @router.get("/explorer/search/{query}")
 async def blockchain_search(query: str):
-    """Search for transactions, blocks, or addresses"""
+    """Search for blocks (by number or hash), transactions, or addresses"""
     try:
-        results = {
+        return {
             "query": query,
-            "results": []
+            "results": await blockchain_gateway.search_explorer(query)
         }
         
-        # Check if it's a transaction hash
-        if query.startswith("0x") and len(query) == 66:
-            try:
-                transaction = await blockchain_gateway.get_transaction_status(query)
-                results["results"].append({
-                    "type": "transaction",
-                    "data": transaction
-                })
-            except:
-                pass
-        
-        # Check if it's an address
-        elif query.startswith("5") and len(query) == 48:
-            try:
-                balance_info = await blockchain_gateway.chain.get_balance(query)
-                results["results"].append({
-                    "type": "address",
-                    "data": {
-                        "address": query,
-                        "balance_hp": balance_info["balance_hp"],
-                        "balance_inr_equiv": balance_info["balance_inr_equiv"]
-                    }
-                })
-            except:
-                pass
-        
-        return results
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@router.get("/subscribe")
+async def subscribe_chain_events(
+    request: Request,
+    tx_hash: Optional[List[str]] = Query(None, description="Transaction hashes to watch until final"),
+    address: Optional[str] = Query(None, description="Address to receive balance changes for"),
+    user_id: Optional[str] = Query(None, description="User whose address to receive balance changes for"),
+    blocks: bool = Query(False, description="Receive every new block")
+):
+    """Server-sent event stream of chain events (replaces polling tx status and balances)"""
+    tx_hashes = tx_hash or []
+    topics = [tx_topic(h) for h in tx_hashes]
+    if user_id:
+        # Read-only: subscribing must not create wallet addresses
+        user_address = await blockchain_gateway.get_user_address(user_id)
+        if user_address is None:
+            raise HTTPException(status_code=404, detail="User has no blockchain address")
+        address = user_address.address
+    if address:
+        topics.append(address_topic(address))
+    if blocks:
+        topics.append(BLOCKS_TOPIC)
+    if not topics:
+        raise HTTPException(status_code=400, detail="Specify tx_hash, address, user_id or blocks")
+    
+    events = blockchain_gateway.chain.events
+    try:
+        subscription = events.subscribe(topics)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # Only transactions still pending keep a tx-only stream open
+    final_statuses = {TransactionStatus.CONFIRMED, TransactionStatus.FAILED, TransactionStatus.FINALIZED}
+    tx_only = not address and not blocks
+    snapshots = []
+    waiting = set()
+    # Subscribed before the snapshots so no status change falls between them
+    try:
+        for h in tx_hashes:
+            transaction = await blockchain_gateway.chain.get_transaction(h)
+            if transaction:
+                snapshots.append(transaction.to_dict())
+                if transaction.status not in final_statuses:
+                    waiting.add(h)
+    except BaseException:
+        events.unsubscribe(subscription)
+        raise
+    
+    async def event_stream():
+        try:
+            for snapshot in snapshots:
+                yield _format_sse("tx_status", snapshot)
+            if tx_only and not waiting:
+                return
+            
+            while not subscription.exhausted:
+                if await request.is_disconnected():
+                    break
+                event = await subscription.get(timeout=15)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                yield _format_sse(event.event, event.data)
+                
+                if event.event == "tx_status" and event.data.get("status") in final_statuses:
+                    waiting.discard(event.data.get("hash"))
+                    if tx_only and not waiting:
+                        break
+        finally:
+            events.unsubscribe(subscription)
+    
+    # The generator's finally never runs if the client is gone before streaming starts
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(events.unsubscribe, subscription)
+    )
+
+def _format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.get("/health")
 async def blockchain_health():
     """Blockchain service health check"""
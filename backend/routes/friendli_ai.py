@@ -2,17 +2,24 @@
 Friendli AI API Routes - Enhanced AI capabilities for financial analytics
 """
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
-from typing import List, Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Dict, Any
 from datetime import datetime
+import json
 import logging
 
 from ..services.friendli_ai_service import friendli_ai_service
 from ..services.blockchain_gateway_service import blockchain_gateway
 from ..services.blockchain_wallet_service import BlockchainWalletService
+from ..services.fraud_screening_service import fraud_screening
+from ..services.transaction_analysis_store import transaction_analysis_store
+from ..services.friendli_ai_service import TRANSACTION_PROMPT_VERSION, BATCH_PROMPT_VERSION
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/ai", tags=["friendli-ai"])
 
+MAX_BATCH_TRANSACTIONS = 5000
+
 @router.post("/analyze-transaction")
 async def analyze_blockchain_transaction(
     transaction_hash: str = Query(..., description="Blockchain transaction hash to analyze"),
@@ -20,21 +27,43 @@ async def analyze_blockchain_transaction(
 ):
     """Analyze a blockchain transaction using Friendli AI for risk and fraud detection"""
     try:
+        # A stored analysis from the current prompt template and model is as good as a new one
+        analysis = await transaction_analysis_store.get(transaction_hash)
+        if analysis is not None:
+            return {
+                "transaction_hash": transaction_hash,
+                "analysis": {
+                    "risk_level": analysis.risk_level,
+                    "risk_score": analysis.risk_score,
+                    "anomaly_detected": analysis.anomaly_detected,
+                    "insights": analysis.insights,
+                    "recommendations": analysis.recommendations,
+                    "fraud_indicators": analysis.fraud_indicators,
+                    "summary": analysis.analysis_summary
+                },
+                "tier": "stored",
+                "analyzed_at": datetime.utcnow().isoformat(),
+                "ai_model": "friendli-meta-llama-3.1-8b-instruct"
+            }
+        
         # Get transaction details from blockchain
         transaction_data = await blockchain_gateway.get_transaction_status(transaction_hash)
         
         if not transaction_data:
             raise HTTPException(status_code=404, detail="Transaction not found")
         
-        # Perform AI analysis
-        analysis = await friendli_ai_service.analyze_blockchain_transaction(transaction_data)
+        # Local pre-screen first; only ambiguous or risky transactions reach the LLM
+        analysis, prescreen = await fraud_screening.analyze_transaction(transaction_data)
+        # A failed LLM call leaves the pre-screen's verdict, which is not an LLM one
+        tier = "local" if prescreen.decision == "clear" or analysis.fallback else "llm"
         
         # Store analysis results for future reference
         if background_tasks:
             background_tasks.add_task(
-                _store_transaction_analysis, 
-                transaction_hash, 
-                analysis.__dict__
+                transaction_analysis_store.save,
+                analysis,
+                TRANSACTION_PROMPT_VERSION if tier == "llm" else None,
+                tier
             )
         
         return {
@@ -48,8 +77,10 @@ async def analyze_blockchain_transaction(
                 "fraud_indicators": analysis.fraud_indicators,
                 "summary": analysis.analysis_summary
             },
+            "tier": tier,
+            "prescreen": prescreen.__dict__,
             "analyzed_at": datetime.utcnow().isoformat(),
-            "ai_model": "friendli-meta-llama-3.1-8b-instruct"
+            "ai_model": "friendli-meta-llama-3.1-8b-instruct" if tier == "llm" else "local-prescreen"
         }
         
     except HTTPException:
@@ -57,6 +88,66 @@ async def analyze_blockchain_transaction(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.post("/analyze-transactions/batch")
+async def analyze_transactions_batch(request_body: Dict[str, Any]):
+    """
+    Risk-score many transactions at once, given `transaction_hashes` or a
+    `from_block`/`to_block` range, and store the analyses
+    """
+    try:
+        transaction_hashes = request_body.get("transaction_hashes", [])
+        if len(transaction_hashes) > MAX_BATCH_TRANSACTIONS:
+            raise ValueError(f"At most {MAX_BATCH_TRANSACTIONS} transactions can be analyzed per request")
+        transactions = []
+        for tx_hash in transaction_hashes:
+            transactions.append(await blockchain_gateway.get_transaction_status(tx_hash))
+        
+        if "from_block" in request_body:
+            chain = blockchain_gateway.chain
+            from_block = int(request_body["from_block"])
+            to_block = int(request_body.get("to_block", chain.current_block))
+            if to_block - from_block >= 1000:
+                raise ValueError("At most 1000 blocks can be analyzed per request")
+            for number in range(from_block, to_block + 1):
+                # No point loading further blocks once the request is over the limit
+                if len(transactions) > MAX_BATCH_TRANSACTIONS:
+                    break
+                block = await chain.get_block(str(number))
+                if block:
+                    transactions.extend(tx.to_dict() for tx in await chain.get_block_transactions(block))
+        
+        if not transactions:
+            raise ValueError("No transactions to analyze")
+        if len(transactions) > MAX_BATCH_TRANSACTIONS:
+            raise ValueError(f"At most {MAX_BATCH_TRANSACTIONS} transactions can be analyzed per request")
+        
+        # Only transactions without a current stored analysis go to the LLM
+        reused = await transaction_analysis_store.get_many([tx.get("hash", "") for tx in transactions])
+        pending = [tx for tx in transactions if tx.get("hash", "") not in reused]
+        fresh = await friendli_ai_service.analyze_transactions_batch(pending) if pending else []
+        stored = await transaction_analysis_store.save_many(fresh, BATCH_PROMPT_VERSION)
+        
+        fresh_by_hash = {analysis.transaction_hash: analysis for analysis in fresh}
+        analyses = [reused.get(tx.get("hash", "")) or fresh_by_hash[tx.get("hash", "")] for tx in transactions]
+        
+        return {
+            "transactions_analyzed": len(analyses),
+            "analyses_reused": len(transactions) - len(pending),
+            "analyses_stored": stored,
+            "risk_levels": {
+                level: sum(1 for analysis in analyses if analysis.risk_level == level)
+                for level in ("low", "medium", "high", "critical")
+            },
+            "analyses": [analysis.__dict__ for analysis in analyses],
+            "analyzed_at": datetime.utcnow().isoformat(),
+            "ai_model": "friendli-meta-llama-3.1-8b-instruct"
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
 @router.get("/wallet-insights/{user_id}")
 async def get_wallet_insights(user_id: str):
     """Generate AI-powered wallet insights and recommendations"""
@@ -109,7 +200,8 @@ async def get_wallet_insights(user_id: str):
 async def enhance_voice_response(
     query: str = Query(..., description="User voice query"),
     user_id: Optional[str] = Query(None, description="User ID for context"),
-    current_feature: Optional[str] = Query(None, description="Current app feature/page")
+    current_feature: Optional[str] = Query(None, description="Current app feature/page"),
+    stream: bool = Query(False, description="Stream tokens as server-sent events")
 ):
     """Enhance voice AI responses using Friendli AI"""
     try:
@@ -131,6 +223,12 @@ async def enhance_voice_response(
                 # Continue without user context if unavailable
                 pass
         
+        if stream:
+            return _token_stream(
+                friendli_ai_service.stream_voice_response(query, context),
+                {"query": query, "context_used": context, "ai_model": "friendli-meta-llama-3.1-8b-instruct"}
+            )
+        
         # Generate enhanced response
         enhanced_response = await friendli_ai_service.enhance_voice_response(query, context)
         
@@ -166,14 +264,14 @@ async def detect_fraud_patterns(user_id: str):
         ]
         
         # Perform fraud analysis
-        fraud_analysis = await friendli_ai_service.detect_fraud_patterns(all_transactions)
+        fraud_analysis = await fraud_screening.detect_fraud_patterns(all_transactions)
         
         return {
             "user_id": user_id,
             "fraud_analysis": fraud_analysis,
             "transactions_analyzed": len(all_transactions),
             "analysis_timestamp": datetime.utcnow().isoformat(),
-            "ai_model": "friendli-meta-llama-3.1-8b-instruct"
+            "ai_model": "friendli-meta-llama-3.1-8b-instruct" if fraud_analysis["prescreen"]["tier"] == "llm" else "local-prescreen"
         }
         
     except Exception as e:
@@ -188,6 +286,17 @@ async def ai_chat(request_body: Dict[str, Any]):
         max_tokens = request_body.get("max_tokens", 500)
         temperature = request_body.get("temperature", 0.7)
         
+        if request_body.get("stream"):
+            return _token_stream(
+                friendli_ai_service.stream_chat_completion(
+                    messages=messages,
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                ),
+                {"model": model or friendli_ai_service.default_model}
+            )
+        
         response = await friendli_ai_service.chat_completion(
             messages=messages,
             model=model,
@@ -208,6 +317,43 @@ async def ai_chat(request_body: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat completion failed: {str(e)}")
 
+def _token_stream(deltas: AsyncIterator[str], summary: Dict[str, Any]) -> StreamingResponse:
+    """
+    Forward content deltas as `token` events, then a `done` event with the full
+    content and timings (or an `error` event if the upstream stream breaks)
+    """
+    async def event_stream():
+        started = datetime.utcnow()
+        first_token_ms = None
+        parts = []
+        try:
+            async for delta in deltas:
+                if first_token_ms is None:
+                    first_token_ms = (datetime.utcnow() - started).total_seconds() * 1000
+                parts.append(delta)
+                yield _format_sse("token", {"content": delta})
+        except Exception as e:
+            logger.error(f"AI token stream failed: {e}")
+            yield _format_sse("error", {"detail": f"Streaming failed: {str(e)}"})
+            return
+        
+        yield _format_sse("done", {
+            **summary,
+            "content": "".join(parts),
+            "first_token_ms": first_token_ms,
+            "response_time_ms": (datetime.utcnow() - started).total_seconds() * 1000
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.get("/analytics/insights")
 async def get_platform_insights(
     days: int = Query(default=7, le=30, description="Number of days to analyze")
@@ -254,18 +400,37 @@ async def get_platform_insights(
             {"role": "user", "content": prompt}
         ]
         
-        response = await friendli_ai_service.chat_completion(messages, max_tokens=600, temperature=0.6)
+        response = await friendli_ai_service.chat_completion(messages, max_tokens=600, temperature=0.6,
+                                                             call_site="platform_insights")
         
         return {
             "platform_insights": response.content,
             "metrics_analyzed": platform_data,
             "analysis_timestamp": datetime.utcnow().isoformat(),
-            "ai_model": response.model
+            "ai_model": response.model,
+            "cached": response.cached
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Platform insights failed: {str(e)}")
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit rates and occupancy of the AI response cache, plus coalescing and scheduler counters"""
+    stats = friendli_ai_service.response_cache.get_stats()
+    stats["single_flight"] = friendli_ai_service.single_flight.get_stats()
+    stats["structured_parses"] = dict(friendli_ai_service.structured_parses)
+    stats["stored_analyses"] = transaction_analysis_store.get_stats()
+    stats["token_usage"] = friendli_ai_service.token_usage
+    stats["scheduler"] = friendli_ai_service.scheduler.get_stats()
+    stats["hedging"] = friendli_ai_service.hedger.get_stats()
+    return stats
+
+@router.get("/fraud-screening/stats")
+async def get_fraud_screening_stats():
+    """Per-tier latency and escalation rate of the tiered fraud analysis"""
+    return fraud_screening.get_stats()
+
 @router.get("/health")
 async def ai_service_health():
     """Health check for Friendli AI service"""
@@ -275,7 +440,9 @@ async def ai_service_health():
             {"role": "user", "content": "Hello, please respond with 'AI service operational' if you're working correctly."}
         ]
         
-        test_response = await friendli_ai_service.chat_completion(test_messages, max_tokens=50, temperature=0.1)
+        # Served from cache between probes so health checks don't each pay for an LLM call
+        test_response = await friendli_ai_service.chat_completion(test_messages, max_tokens=50, temperature=0.1,
+                                                                  call_site="health")
         
         return {
             "status": "healthy",
@@ -283,6 +450,7 @@ async def ai_service_health():
             "ai_response_test": "passed" if "operational" in test_response.content.lower() else "warning",
             "model": test_response.model,
             "response_time_ms": test_response.response_time_ms,
+            "cached": test_response.cached,
             "features": {
                 "transaction_analysis": "operational",
                 "wallet_insights": "operational",
@@ -300,23 +468,3 @@ async def ai_service_health():
             "error": str(e),
             "last_check": datetime.utcnow().isoformat()
         }
-
-# Background task functions
-async def _store_transaction_analysis(transaction_hash: str, analysis: Dict[str, Any]):
-    """Store transaction analysis results"""
-    try:
-        from ..services.database import get_collection
-        
-        analysis_collection = await get_collection("ai_transaction_analysis")
-        
-        analysis_record = {
-            "transaction_hash": transaction_hash,
-            "analysis": analysis,
-            "created_at": datetime.utcnow(),
-            "ai_service": "friendli_ai"
-        }
-        
-        await analysis_collection.insert_one(analysis_record)
-        
-    except Exception as e:
-        logger.error(f"Failed to store transaction analysis: {e}")
\ No newline at end of file
@@ -73,6 +73,12 @@ async def health_check():
             "error": str(e)
         }
 
+@api_router.get("/health/upstreams")
+async def upstream_pool_stats():
+    """Per-upstream HTTP connection pool stats"""
+    from .services.http_client_registry import http_clients
+    return http_clients.get_stats()
+
 # Include all route modules
 app.include_router(users.router)
 app.include_router(wallet.router)
@@ -112,15 +118,59 @@ async def startup_event():
     """Initialize application on startup"""
     logger.info("Axzora Mr. Happy 2.0 API starting up with advanced voice capabilities...")
     
+    # Open the shared keep-alive pools for outbound integrations
+    from .services.http_client_registry import http_clients
+    await http_clients.start()
+    
+    # Create blockchain address indexes and warm the address cache
+    from .services.blockchain_gateway_service import blockchain_gateway
+    await blockchain_gateway.initialize()
+    
+    # Convert wallets still holding float balances to integer planck
+    from .services.wallet_service import WalletService
+    try:
+        await WalletService.migrate_float_balances()
+    except Exception as e:
+        logger.error(f"Failed to migrate wallet balances: {e}")
+    
     # Initialize sample data if needed
     await initialize_sample_data()
     
+    # Periodic chain/ledger reconciliation
+    from .services.reconciliation_service import ledger_reconciliation
+    try:
+        await ledger_reconciliation.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create reconciliation indexes: {e}")
+    ledger_reconciliation.start()
+
+    # TTL index for the optional MongoDB tier of the AI response cache
+    from .services.friendli_ai_service import friendli_ai_service
+    try:
+        await friendli_ai_service.response_cache.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create AI response cache indexes: {e}")
+    from .services.transaction_analysis_store import transaction_analysis_store
+    try:
+        await transaction_analysis_store.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create transaction analysis indexes: {e}")
+    from .services.amadeus_search_cache import amadeus_search_cache
+    try:
+        await amadeus_search_cache.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create Amadeus search cache indexes: {e}")
+
     logger.info("Advanced AI voice system ready!")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connections on shutdown"""
     logger.info("Shutting down Axzora Mr. Happy 2.0 API...")
+    from .services.reconciliation_service import ledger_reconciliation
+    await ledger_reconciliation.stop()
+    from .services.http_client_registry import http_clients
+    await http_clients.close()
     client.close()
 
 async def initialize_sample_data():
@@ -0,0 +1,226 @@
+"""
+Happy Paisa Address Registry Service
+Persisted user_id -> blockchain address mapping with a bounded LRU front cache
+"""
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+import logging
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from ..services.database import get_collection
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BlockchainAddress:
+    """Represents a Substrate address"""
+    address: str
+    public_key: str
+    network: str = "happy-paisa-chain"
+
+    def to_dict(self):
+        return {
+            "address": self.address,
+            "public_key": self.public_key,
+            "network": self.network
+        }
+
+class UserAddressRegistry:
+    """
+    Source of truth for user addresses is the blockchain_addresses collection
+    (unique on user_id); this class fronts it with an LRU cache so resolving an
+    address costs at most one indexed read, and creation is an atomic upsert so
+    concurrent workers always converge on the same address.
+    """
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self._cache: "OrderedDict[str, BlockchainAddress]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+
+    @staticmethod
+    def _new_address_record(user_id: str) -> Dict[str, Any]:
+        # Generate new address (simplified - in production use proper key generation)
+        return {
+            "user_id": user_id,
+            "address": f"5{secrets.token_hex(24)}",
+            "public_key": f"0x{secrets.token_hex(32)}",
+            "network": "happy-paisa-chain",
+            "created_at": datetime.utcnow()
+        }
+
+    @staticmethod
+    def _from_record(record: Dict[str, Any]) -> BlockchainAddress:
+        return BlockchainAddress(
+            address=record["address"],
+            public_key=record["public_key"],
+            network=record.get("network", "happy-paisa-chain")
+        )
+
+    def _remember(self, user_id: str, address: BlockchainAddress):
+        self._cache[user_id] = address
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def get_cached(self, user_id: str) -> Optional[BlockchainAddress]:
+        address = self._cache.get(user_id)
+        if address is not None:
+            self._cache.move_to_end(user_id)
+        return address
+
+    async def ensure_indexes(self):
+        """Create the unique indexes, removing duplicate rows left by older versions first"""
+        collection = await get_collection("blockchain_addresses")
+        try:
+            await collection.create_index("user_id", unique=True)
+        except OperationFailure as e:
+            if e.code != 11000:
+                raise
+            await self._remove_duplicate_records(collection)
+            await collection.create_index("user_id", unique=True)
+        await collection.create_index("address", unique=True)
+
+    async def _remove_duplicate_records(self, collection):
+        """Keep the oldest address per user and delete later duplicates"""
+        pipeline = [
+            {"$sort": {"created_at": 1}},
+            {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ]
+        duplicate_ids = []
+        async for group in collection.aggregate(pipeline):
+            duplicate_ids.extend(group["ids"][1:])
+        if duplicate_ids:
+            await collection.delete_many({"_id": {"$in": duplicate_ids}})
+            logger.warning(f"Removed {len(duplicate_ids)} duplicate blockchain address records")
+
+    async def warm(self, limit: int = None) -> int:
+        """Bulk-load the most recently created addresses into the cache"""
+        limit = min(limit or self.capacity, self.capacity)
+        collection = await get_collection("blockchain_addresses")
+        cursor = collection.find(
+            {}, {"_id": 0, "user_id": 1, "address": 1, "public_key": 1, "network": 1}
+        ).sort("created_at", -1).limit(limit)
+
+        records = await cursor.to_list(limit)
+        # Insert oldest first so the newest end up most recently used
+        for record in reversed(records):
+            self._remember(record["user_id"], self._from_record(record))
+
+        logger.info(f"Warmed address registry with {len(records)} addresses")
+        return len(records)
+
+    async def get(self, user_id: str) -> Optional[BlockchainAddress]:
+        """Resolve a user's address without creating one"""
+        address = self.get_cached(user_id)
+        if address is not None:
+            self.hits += 1
+            return address
+
+        self.misses += 1
+        collection = await get_collection("blockchain_addresses")
+        record = await collection.find_one({"user_id": user_id})
+        if record is None:
+            return None
+        address = self._from_record(record)
+        self._remember(user_id, address)
+        return address
+
+    async def get_or_create(self, user_id: str) -> BlockchainAddress:
+        """Resolve a user's address, creating it atomically if it does not exist"""
+        address = self.get_cached(user_id)
+        if address is not None:
+            self.hits += 1
+            return address
+
+        self.misses += 1
+        collection = await get_collection("blockchain_addresses")
+        new_record = self._new_address_record(user_id)
+        try:
+            record = await collection.find_one_and_update(
+                {"user_id": user_id},
+                {"$setOnInsert": new_record},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker won the upsert race
+            record = await collection.find_one({"user_id": user_id})
+
+        if record["address"] == new_record["address"]:
+            self.created += 1
+            logger.info(f"Created blockchain address {record['address']} for user {user_id}")
+
+        address = self._from_record(record)
+        self._remember(user_id, address)
+        return address
+
+    async def get_many_or_create(self, user_ids: List[str]) -> Dict[str, BlockchainAddress]:
+        """Resolve many users with one lookup query and one bulk upsert"""
+        resolved = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            address = self.get_cached(user_id)
+            if address is not None:
+                resolved[user_id] = address
+            else:
+                missing.append(user_id)
+
+        self.hits += len(resolved)
+        self.misses += len(missing)
+        if not missing:
+            return resolved
+
+        collection = await get_collection("blockchain_addresses")
+        async for record in collection.find({"user_id": {"$in": missing}}):
+            resolved[record["user_id"]] = self._from_record(record)
+
+        new_records = [self._new_address_record(user_id) for user_id in missing if user_id not in resolved]
+        if new_records:
+            try:
+                result = await collection.bulk_write(
+                    [UpdateOne({"user_id": r["user_id"]}, {"$setOnInsert": r}, upsert=True) for r in new_records],
+                    ordered=False
+                )
+                upserted = result.upserted_ids or {}
+            except BulkWriteError as e:
+                # Duplicate keys are concurrent upserts of the same user; anything else is a real failure
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+            lost_races = []
+            for index, record in enumerate(new_records):
+                if index in upserted:
+                    resolved[record["user_id"]] = self._from_record(record)
+                else:
+                    lost_races.append(record["user_id"])
+            # Rows created concurrently by another worker win over ours
+            if lost_races:
+                async for record in collection.find({"user_id": {"$in": lost_races}}):
+                    resolved[record["user_id"]] = self._from_record(record)
+
+            self.created += len(upserted)
+            logger.info(f"Created {len(upserted)} blockchain addresses in bulk")
+
+        for user_id in missing:
+            self._remember(user_id, resolved[user_id])
+        return resolved
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cached_addresses": len(self._cache),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "created": self.created
+        }
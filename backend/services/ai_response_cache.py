@@ -0,0 +1,166 @@
+"""
+AI Response Cache
+TTL + LRU cache for LLM completions with an optional MongoDB second tier
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple, Any
+import logging
+
+from ..services.database import get_collection
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def completion_cache_key(model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                         response_format: Dict[str, Any] = None) -> str:
+    """Stable key over the normalized request; indentation and spacing in prompts don't matter"""
+    normalized = {
+        "model": model,
+        "messages": [
+            {"role": message.get("role", ""), "content": _WHITESPACE.sub(" ", message.get("content", "")).strip()}
+            for message in messages
+        ],
+        "max_tokens": max_tokens,
+        "temperature": round(float(temperature), 3),
+        "response_format": response_format
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+class CallSiteStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.mongo_hits = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class AIResponseCache:
+    """
+    In-process OrderedDict LRU (bounded by capacity) where every entry carries its own
+    expiry, so each call site can choose a TTL. With mongo_tier enabled, entries are
+    also written to ai_response_cache (TTL-indexed on expires_at) so other workers and
+    restarts can reuse them.
+    """
+
+    def __init__(self, capacity: int = 2048, mongo_tier: bool = False):
+        self.capacity = capacity
+        self.mongo_tier = mongo_tier
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()  # key -> (expires monotonic, value)
+        self.call_sites: Dict[str, CallSiteStats] = {}
+        self.evictions = 0
+        self.expirations = 0
+        self.mongo_errors = 0
+        self._pending_writes: Set[asyncio.Task] = set()
+
+    async def ensure_indexes(self):
+        if self.mongo_tier:
+            collection = await get_collection("ai_response_cache")
+            await collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def _stats(self, call_site: str) -> CallSiteStats:
+        stats = self.call_sites.get(call_site)
+        if stats is None:
+            stats = self.call_sites[call_site] = CallSiteStats()
+        return stats
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_memory(self, key: str, value: Dict[str, Any], ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str, call_site: str) -> Optional[Dict[str, Any]]:
+        stats = self._stats(call_site)
+        value = self._get_memory(key)
+        if value is not None:
+            stats.hits += 1
+            stats.memory_hits += 1
+            return value
+
+        if self.mongo_tier:
+            try:
+                collection = await get_collection("ai_response_cache")
+                record = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                self.mongo_errors += 1
+                logger.warning(f"AI response cache lookup failed: {e}")
+                record = None
+            if record is not None:
+                remaining = (record["expires_at"] - datetime.utcnow()).total_seconds()
+                self._set_memory(key, record["value"], remaining)
+                stats.hits += 1
+                stats.mongo_hits += 1
+                return record["value"]
+
+        stats.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float, call_site: str):
+        self._set_memory(key, value, ttl)
+        if self.mongo_tier:
+            # Written in the background so the caller doesn't wait on MongoDB
+            task = asyncio.create_task(self._write_mongo(key, value, ttl, call_site))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _write_mongo(self, key: str, value: Dict[str, Any], ttl: float, call_site: str):
+        try:
+            collection = await get_collection("ai_response_cache")
+            await collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "value": value,
+                    "call_site": call_site,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=ttl)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            self.mongo_errors += 1
+            logger.warning(f"AI response cache write failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = sum(stats.hits for stats in self.call_sites.values())
+        lookups = hits + sum(stats.misses for stats in self.call_sites.values())
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "mongo_tier": self.mongo_tier,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "mongo_errors": self.mongo_errors,
+            "call_sites": {name: stats.to_dict() for name, stats in self.call_sites.items()}
+        }
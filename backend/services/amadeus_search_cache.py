@@ -0,0 +1,357 @@
+"""
+Amadeus Search Cache
+Normalized-parameter cache for flight and hotel search with stale-while-revalidate and quota awareness
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple, Any
+import logging
+
+from pymongo import ReturnDocument
+
+from ..services.amadeus_transport import amadeus_base_url
+from ..services.database import get_collection
+from ..services.rate_limit import TokenBucket
+from ..services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_DATE_PARAMS = {"departureDate", "returnDate", "checkInDate", "checkOutDate"}
+
+# (days to departure/check-in, seconds fresh) - fares close to the date move fastest
+FRESH_TTLS = {
+    "flights": [(3, 300), (14, 900), (60, 3600)],
+    "hotels": [(3, 600), (14, 1800), (60, 3600)]
+}
+FAR_FUTURE_TTL = 6 * 3600
+# Past the fresh TTL an entry is still served (and refreshed in the background) for this many TTLs more
+STALE_FACTOR = 3
+
+# Per-key limits of the Amadeus Self-Service tiers; AMADEUS_RATE_LIMIT_TPS / AMADEUS_MONTHLY_QUOTA override
+AMADEUS_LIMITS = {
+    "test": {"tps": 10, "monthly": 2000},
+    "production": {"tps": 40, "monthly": 0}  # 0 = no monthly cap (pay per call)
+}
+# Share of the monthly quota after which stale entries are served without refreshing
+QUOTA_CONSERVE_AT = 0.9
+
+def normalize_search_params(params: Dict[str, Any]) -> Dict[str, str]:
+    """Codes upper-cased, dates in ISO form, numbers and booleans canonical, empty values dropped"""
+    normalized = {}
+    for name, value in params.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        elif isinstance(value, (int, float)):
+            value = str(int(value)) if float(value).is_integer() else str(value)
+        elif name in _DATE_PARAMS:
+            value = date.fromisoformat(str(value).strip()[:10]).isoformat()
+        else:
+            value = str(value).strip().upper()
+        normalized[name] = value
+    return normalized
+
+def search_cache_key(kind: str, params: Dict[str, Any], upstream: str = "") -> str:
+    """upstream (the Amadeus base URL) keeps test, production and mock results apart in the shared tier"""
+    canonical = json.dumps([upstream, normalize_search_params(params)], sort_keys=True)
+    return f"{kind}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+def fresh_ttl(kind: str, travel_date: str) -> Optional[float]:
+    """Seconds a result stays fresh, or None if the date has passed (not cacheable)"""
+    days = (date.fromisoformat(str(travel_date)[:10]) - datetime.utcnow().date()).days
+    if days < 0:
+        return None
+    for max_days, ttl in FRESH_TTLS[kind]:
+        if days <= max_days:
+            return ttl
+    return FAR_FUTURE_TTL
+
+def _epoch(value: datetime) -> float:
+    """MongoDB returns naive UTC datetimes"""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+def is_error(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("error"))
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float  # epoch seconds
+    stale_until: float
+
+class KindStats:
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.mongo_hits = 0
+        self.refreshes = 0
+        self.refreshes_skipped = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "mongo_hits": self.mongo_hits,
+            "refreshes": self.refreshes,
+            "refreshes_skipped": self.refreshes_skipped,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
+
+class AmadeusQuota:
+    """
+    Upstream calls pass through a per-process token bucket at the key's TPS limit and
+    are counted per API per calendar month in amadeus_quota, so every worker sees
+    the same usage. Near the monthly cap the cache stops refreshing and serves stale
+    results; at the cap only cache hits are served.
+    """
+
+    def __init__(self, environment: str):
+        limits = AMADEUS_LIMITS.get(environment, AMADEUS_LIMITS["test"])
+        tps = float(os.environ.get("AMADEUS_RATE_LIMIT_TPS", limits["tps"]))
+        self.monthly = int(os.environ.get("AMADEUS_MONTHLY_QUOTA", limits["monthly"]))
+        self.bucket = TokenBucket(tps, tps)
+        self.used: Dict[str, int] = {}  # "<kind>:<YYYY-MM>" -> calls, as last seen
+        self.rejected = 0
+
+    def _period(self, kind: str) -> str:
+        return f"{kind}:{datetime.utcnow():%Y-%m}"
+
+    def _usage(self, kind: str) -> float:
+        return self.used.get(self._period(kind), 0) / self.monthly if self.monthly else 0.0
+
+    def conserving(self, kind: str) -> bool:
+        return self._usage(kind) >= QUOTA_CONSERVE_AT
+
+    def exhausted(self, kind: str) -> bool:
+        return self._usage(kind) >= 1.0
+
+    async def acquire(self, kind: str, wait: bool = True) -> bool:
+        """Take one call from the rate limit and monthly quota; False if the call must not be made"""
+        if self.exhausted(kind):
+            self.rejected += 1
+            return False
+        delay = self.bucket.wait_time(1)
+        if delay > 0 and not wait:
+            return False
+        # Reserve the token before sleeping so concurrent callers queue up behind each other
+        self.bucket.take(1)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._count(kind)
+        return True
+
+    async def _count(self, kind: str):
+        period = self._period(kind)
+        try:
+            collection = await get_collection("amadeus_quota")
+            record = await collection.find_one_and_update(
+                {"_id": period}, {"$inc": {"calls": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            self.used[period] = record["calls"]
+        except Exception as e:
+            logger.warning(f"Amadeus quota counter update failed: {e}")
+            self.used[period] = self.used.get(period, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate_limit_tps": self.bucket.rate,
+            "monthly_quota": self.monthly or None,
+            "used_this_month": {period: calls for period, calls in self.used.items()
+                                if period.endswith(f"{datetime.utcnow():%Y-%m}")},
+            "rejected": self.rejected
+        }
+
+class AmadeusSearchCache:
+    """
+    Results are keyed by kind plus normalized search parameters. An entry is fresh
+    for a TTL that shrinks as the travel date approaches, then stale for
+    STALE_FACTOR more TTLs: stale hits are answered immediately while one
+    background refresh per key fetches a new result. The in-process LRU sits in
+    front of amadeus_search_cache in MongoDB (TTL-indexed on stale_until), which
+    workers share. Concurrent misses for a key make one upstream call, and error
+    results are never cached.
+    """
+
+    def __init__(self, quota: AmadeusQuota, upstream: str, capacity: int = 1024, mongo_tier: bool = True):
+        self.quota = quota
+        self.upstream = upstream
+        self.capacity = capacity
+        self.mongo_tier = mongo_tier
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.single_flight = SingleFlight()
+        self.kinds: Dict[str, KindStats] = {}
+        self.evictions = 0
+        self.mongo_errors = 0
+        self._refreshing: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+
+    async def ensure_indexes(self):
+        if self.mongo_tier:
+            collection = await get_collection("amadeus_search_cache")
+            await collection.create_index("stale_until", expireAfterSeconds=0)
+
+    def _stats(self, kind: str) -> KindStats:
+        stats = self.kinds.get(kind)
+        if stats is None:
+            stats = self.kinds[kind] = KindStats()
+        return stats
+
+    def _spawn(self, coroutine: Awaitable[Any]):
+        task = asyncio.ensure_future(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _lookup(self, kind: str, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.stale_until > time.time():
+                self._entries.move_to_end(key)
+                return entry
+            del self._entries[key]
+
+        if self.mongo_tier:
+            try:
+                collection = await get_collection("amadeus_search_cache")
+                record = await collection.find_one({"_id": key, "stale_until": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                self.mongo_errors += 1
+                logger.warning(f"Amadeus search cache lookup failed: {e}")
+                record = None
+            if record is not None:
+                entry = CacheEntry(record["value"], _epoch(record["fresh_until"]), _epoch(record["stale_until"]))
+                self._remember(key, entry)
+                self._stats(kind).mongo_hits += 1
+                return entry
+        return None
+
+    def _remember(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _store(self, kind: str, key: str, params: Dict[str, Any], value: Any, ttl: float):
+        now = time.time()
+        entry = CacheEntry(value, now + ttl, now + ttl * (1 + STALE_FACTOR))
+        self._remember(key, entry)
+        if self.mongo_tier:
+            self._spawn(self._write_mongo(kind, key, params, entry))
+
+    async def _write_mongo(self, kind: str, key: str, params: Dict[str, Any], entry: CacheEntry):
+        try:
+            collection = await get_collection("amadeus_search_cache")
+            await collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "kind": kind,
+                    "params": normalize_search_params(params),
+                    "value": entry.value,
+                    "fresh_until": datetime.utcfromtimestamp(entry.fresh_until),
+                    "stale_until": datetime.utcfromtimestamp(entry.stale_until)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            self.mongo_errors += 1
+            logger.warning(f"Amadeus search cache write failed: {e}")
+
+    async def _fetch_and_store(self, kind: str, key: str, params: Dict[str, Any],
+                               fetch: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        if not await self.quota.acquire(kind):
+            return {
+                "error": True,
+                "message": f"Amadeus {kind} search quota exhausted for this month; only cached results are available",
+                "code": 429
+            }
+        result = await fetch()
+        if ttl is not None and not is_error(result):
+            self._store(kind, key, params, result, ttl)
+        return result
+
+    def _revalidate(self, kind: str, key: str, params: Dict[str, Any],
+                    fetch: Callable[[], Awaitable[Any]], ttl: float):
+        stats = self._stats(kind)
+        if key in self._refreshing or self.quota.conserving(kind):
+            stats.refreshes_skipped += 1
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                # Background refreshes never queue behind the rate limit; the stale entry keeps serving
+                if not await self.quota.acquire(kind, wait=False):
+                    stats.refreshes_skipped += 1
+                    return
+                result = await fetch()
+                if is_error(result):
+                    logger.warning(f"Amadeus {kind} refresh failed, keeping stale entry: {result.get('message')}")
+                else:
+                    self._store(kind, key, params, result, ttl)
+                    stats.refreshes += 1
+            finally:
+                self._refreshing.discard(key)
+
+        self._spawn(refresh())
+
+    async def get_or_fetch(self, kind: str, params: Dict[str, Any], travel_date: str,
+                           fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Search result and how it was served: hit, stale, miss or bypass"""
+        stats = self._stats(kind)
+        try:
+            ttl = fresh_ttl(kind, travel_date)
+        except ValueError:
+            ttl = None
+        key = search_cache_key(kind, params, self.upstream)
+        if ttl is None:
+            stats.bypassed += 1
+            return await self._fetch_and_store(kind, key, params, fetch, None), "bypass"
+
+        entry = await self._lookup(kind, key)
+        if entry is not None:
+            if entry.fresh_until > time.time():
+                stats.hits += 1
+                return entry.value, "hit"
+            stats.stale_hits += 1
+            self._revalidate(kind, key, params, fetch, ttl)
+            return entry.value, "stale"
+
+        stats.misses += 1
+        result = await self.single_flight.run(key, lambda: self._fetch_and_store(kind, key, params, fetch, ttl))
+        return result, "miss"
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "mongo_tier": self.mongo_tier,
+            "evictions": self.evictions,
+            "mongo_errors": self.mongo_errors,
+            "refreshing": len(self._refreshing),
+            "single_flight": self.single_flight.get_stats(),
+            "quota": self.quota.get_stats(),
+            "kinds": {kind: stats.to_dict() for kind, stats in self.kinds.items()}
+        }
+
+# Global instance
+amadeus_search_cache = AmadeusSearchCache(
+    AmadeusQuota(os.environ.get("AMADEUS_ENVIRONMENT", "test")),
+    amadeus_base_url(os.environ.get("AMADEUS_ENVIRONMENT", "test")),
+    capacity=int(os.environ.get("AMADEUS_CACHE_CAPACITY", "1024")),
+    mongo_tier=os.environ.get("AMADEUS_CACHE_MONGO", "true").lower() == "true"
+)
@@ -2,10 +2,11 @@ import os
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from amadeus import Client, ResponseError
-import asyncio
 from functools import wraps
 
+from .amadeus_search_cache import amadeus_search_cache
+from .amadeus_transport import AmadeusTransport, AmadeusAPIError, amadeus_base_url
+
 logger = logging.getLogger(__name__)
 
 class AmadeusService:
@@ -15,11 +16,11 @@ class AmadeusService:
     """
     
     def __init__(self):
-        self.client = None
+        self.transport = None
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize real Amadeus client with test credentials"""
+        """Initialize the async Amadeus transport with test credentials"""
         try:
             api_key = os.environ.get('AMADEUS_API_KEY')
             api_secret = os.environ.get('AMADEUS_API_SECRET')
@@ -28,10 +29,13 @@ class AmadeusService:
             if not api_key or not api_secret:
                 raise ValueError("Amadeus API credentials not found in environment variables")
             
-            self.client = Client(
+            base_url = amadeus_base_url(environment)
+            
+            self.transport = AmadeusTransport(
                 client_id=api_key,
                 client_secret=api_secret,
-                hostname=environment  # 'test' for test environment
+                base_url=base_url,
+                max_connections=int(os.environ.get('AMADEUS_MAX_CONNECTIONS', '20'))
             )
             
             logger.info(f"Real Amadeus client initialized successfully for {environment} environment")
@@ -42,21 +46,18 @@ class AmadeusService:
             raise
     
     def async_amadeus_call(func):
-        """Decorator to handle async Amadeus API calls"""
+        """Decorator to turn Amadeus API failures into error results"""
         @wraps(func)
         async def wrapper(self, *args, **kwargs):
             try:
-                # Run the blocking Amadeus call in a thread pool
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(None, func, self, *args, **kwargs)
-                return result
-            except ResponseError as error:
+                return await func(self, *args, **kwargs)
+            except AmadeusAPIError as error:
                 logger.error(f"Amadeus API error in {func.__name__}: {error}")
                 return {
                     "error": True,
                     "message": str(error),
-                    "code": getattr(error, 'response', {}).get('status_code', 500),
-                    "details": getattr(error, 'response', {}).get('body', {})
+                    "code": error.status_code,
+                    "details": error.body or {}
                 }
             except Exception as e:
                 logger.error(f"Unexpected error in {func.__name__}: {str(e)}")
@@ -68,13 +69,13 @@ class AmadeusService:
         return wrapper
     
     @async_amadeus_call
-    def _search_flights_sync(self, **params):
-        """Real synchronous flight search using Amadeus API"""
+    async def _search_flights_api(self, **params):
+        """Real flight search using Amadeus API"""
         try:
             logger.info(f"Calling real Amadeus flight search with params: {params}")
-            response = self.client.shopping.flight_offers_search.get(**params)
-            logger.info(f"Amadeus API response received: {len(response.data) if response.data else 0} flights")
-            return response.data
+            data = await self.transport.flight_offers(**params)
+            logger.info(f"Amadeus API response received: {len(data)} flights")
+            return data
         except Exception as e:
             logger.error(f"Error in Amadeus flight search: {str(e)}")
             raise
@@ -123,7 +124,9 @@ class AmadeusService:
         if 'maxPrice' in kwargs:
             params['maxPrice'] = kwargs['maxPrice']
         
-        result = await self._search_flights_sync(**params)
+        result, cache_status = await amadeus_search_cache.get_or_fetch(
+            "flights", params, departure_date, lambda: self._search_flights_api(**params)
+        )
         
         if isinstance(result, dict) and result.get('error'):
             return result
@@ -139,7 +142,8 @@ class AmadeusService:
             "flights": processed_flights,
             "total_results": len(processed_flights),
             "search_params": params,
-            "currency": currency
+            "currency": currency,
+            "cache": cache_status
         }
     
     def _process_flight_offer(self, flight_offer: Dict) -> Dict[str, Any]:
@@ -260,13 +264,13 @@ class AmadeusService:
             }
     
     @async_amadeus_call
-    def _search_hotels_sync(self, **params):
-        """Real synchronous hotel search using Amadeus API"""
+    async def _search_hotels_api(self, **params):
+        """Real hotel search using Amadeus API"""
         try:
             logger.info(f"Calling real Amadeus hotel search with params: {params}")
-            response = self.client.shopping.hotel_offers_search.get(**params)
-            logger.info(f"Amadeus hotel API response received: {len(response.data) if response.data else 0} hotels")
-            return response.data
+            data = await self.transport.hotel_offers(**params)
+            logger.info(f"Amadeus hotel API response received: {len(data)} hotels")
+            return data
         except Exception as e:
             logger.error(f"Error in Amadeus hotel search: {str(e)}")
             raise
@@ -303,7 +307,9 @@ class AmadeusService:
         if 'maxPrice' in kwargs:
             params['priceRange'] = f"1-{kwargs['maxPrice']}"
         
-        result = await self._search_hotels_sync(**params)
+        result, cache_status = await amadeus_search_cache.get_or_fetch(
+            "hotels", params, check_in_date, lambda: self._search_hotels_api(**params)
+        )
         
         if isinstance(result, dict) and result.get('error'):
             return result
@@ -319,7 +325,8 @@ class AmadeusService:
             "hotels": processed_hotels,
             "total_results": len(processed_hotels),
             "search_params": params,
-            "currency": currency
+            "currency": currency,
+            "cache": cache_status
         }
     
     def _process_hotel_offer(self, hotel_offer: Dict) -> Dict[str, Any]:
@@ -433,13 +440,13 @@ class AmadeusService:
             }
     
     @async_amadeus_call
-    def _search_destinations_sync(self, **params):
-        """Real synchronous destination search using Amadeus API"""
+    async def _search_destinations_api(self, **params):
+        """Real destination search using Amadeus API"""
         try:
             logger.info(f"Calling real Amadeus destination search with params: {params}")
-            response = self.client.reference_data.locations.cities.get(**params)
-            logger.info(f"Amadeus destination API response received: {len(response.data) if response.data else 0} destinations")
-            return response.data
+            data = await self.transport.cities(**params)
+            logger.info(f"Amadeus destination API response received: {len(data)} destinations")
+            return data
         except Exception as e:
             logger.error(f"Error in Amadeus destination search: {str(e)}")
             raise
@@ -463,7 +470,7 @@ class AmadeusService:
         if country_code:
             params['countryCode'] = country_code
         
-        result = await self._search_destinations_sync(**params)
+        result = await self._search_destinations_api(**params)
         
         if isinstance(result, dict) and result.get('error'):
             return result
@@ -0,0 +1,171 @@
+"""
+Amadeus Transport
+Native async client for the Amadeus Self-Service endpoints we use, with a shared OAuth token
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Any
+import logging
+
+import httpx
+
+from ..services.http_client_registry import http_clients
+
+logger = logging.getLogger(__name__)
+
+AMADEUS_HOSTS = {
+    "test": "https://test.api.amadeus.com",
+    "production": "https://api.amadeus.com"
+}
+# AMADEUS_BASE_URL overrides the environment's host, e.g. to point at a local mock
+def amadeus_base_url(environment: str) -> str:
+    return os.environ.get("AMADEUS_BASE_URL") or AMADEUS_HOSTS.get(environment, AMADEUS_HOSTS["test"])
+
+# Refresh the token in the background once it has less than this many seconds left
+REFRESH_AHEAD_SECONDS = 300
+# ...and inline (callers wait) when it is this close to expiring
+MIN_TOKEN_SECONDS = 30
+
+class AmadeusAPIError(Exception):
+    """Non-2xx response from the Amadeus API"""
+
+    def __init__(self, status_code: int, body: Any = None):
+        errors = body.get("errors", []) if isinstance(body, dict) else []
+        title = errors[0].get("title") or errors[0].get("detail") if errors else None
+        super().__init__(f"Amadeus API error: {status_code}" + (f" - {title}" if title else ""))
+        self.status_code = status_code
+        self.body = body
+
+class AmadeusTokenCache:
+    """
+    One client-credentials token shared by every request in the process. Callers
+    get the current token without waiting while it has more than
+    REFRESH_AHEAD_SECONDS left; inside that window one background refresh replaces
+    it, and only a missing or nearly expired token makes callers wait (on a single
+    shared refresh).
+    """
+
+    def __init__(self, client_id: str, client_secret: str):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self._token: Optional[str] = None
+        self._expires_at = 0.0  # monotonic
+        self._refresh: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.background_refreshes = 0
+        self.failures = 0
+
+    def _remaining(self) -> float:
+        return self._expires_at - time.monotonic()
+
+    async def _fetch(self) -> str:
+        response = await http_clients.get("amadeus").post(
+            "/v1/security/oauth2/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            }
+        )
+        if response.is_error:
+            self.failures += 1
+            raise AmadeusAPIError(response.status_code, _json_or_text(response))
+        body = response.json()
+        self._token = body["access_token"]
+        self._expires_at = time.monotonic() + float(body.get("expires_in", 1799))
+        self.refreshes += 1
+        return self._token
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._fetch())
+            self._refresh.add_done_callback(_log_refresh_failure)
+        return self._refresh
+
+    async def get(self) -> str:
+        remaining = self._remaining()
+        if self._token is not None and remaining > MIN_TOKEN_SECONDS:
+            if remaining < REFRESH_AHEAD_SECONDS and (self._refresh is None or self._refresh.done()):
+                self.background_refreshes += 1
+                self._start_refresh()
+            return self._token
+        return await asyncio.shield(self._start_refresh())
+
+    def invalidate(self, token: str):
+        """Drop a token the API rejected (unless a newer one already replaced it)"""
+        if self._token == token:
+            self._token = None
+            self._expires_at = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "valid": self._token is not None and self._remaining() > 0,
+            "expires_in_seconds": max(0, round(self._remaining())) if self._token else 0,
+            "refreshes": self.refreshes,
+            "background_refreshes": self.background_refreshes,
+            "failures": self.failures
+        }
+
+def _json_or_text(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+def _log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Amadeus token refresh failed: {task.exception()}")
+
+def _query(params: Dict[str, Any]) -> Dict[str, str]:
+    """Amadeus expects lower-case booleans in query strings"""
+    return {name: ("true" if value else "false") if isinstance(value, bool) else str(value)
+            for name, value in params.items() if value is not None}
+
+class AmadeusTransport:
+    """
+    Requests go over the pooled "amadeus" client (keep-alive, HTTP/2 where
+    available) with the shared bearer token. A 401 drops the token and retries
+    once with a fresh one; any other error status raises AmadeusAPIError.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, base_url: str, max_connections: int = 20):
+        self.base_url = base_url
+        self.tokens = AmadeusTokenCache(client_id, client_secret)
+        self.endpoints: Dict[str, Dict[str, int]] = {}  # path -> counters
+        http_clients.register(
+            "amadeus",
+            base_url=base_url,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            max_connections=max_connections,
+            max_keepalive=max_connections
+        )
+
+    async def get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        counters = self.endpoints.setdefault(path, {"requests": 0, "errors": 0, "token_retries": 0})
+        counters["requests"] += 1
+        for attempt in range(2):
+            token = await self.tokens.get()
+            response = await http_clients.get("amadeus").get(
+                path, params=_query(params), headers={"Authorization": f"Bearer {token}"}
+            )
+            if response.status_code == 401 and attempt == 0:
+                counters["token_retries"] += 1
+                self.tokens.invalidate(token)
+                continue
+            if response.is_error:
+                counters["errors"] += 1
+                raise AmadeusAPIError(response.status_code, _json_or_text(response))
+            return response.json()
+
+    async def flight_offers(self, **params) -> List[Dict[str, Any]]:
+        return (await self.get("/v2/shopping/flight-offers", params)).get("data", [])
+
+    async def hotel_offers(self, **params) -> List[Dict[str, Any]]:
+        return (await self.get("/v3/shopping/hotel-offers", params)).get("data", [])
+
+    async def cities(self, **params) -> List[Dict[str, Any]]:
+        return (await self.get("/v1/reference-data/locations/cities", params)).get("data", [])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "token": self.tokens.get_stats(), "endpoints": self.endpoints}
@@ -14,10 +14,16 @@ from firebase_admin import credentials
 # Removed analytics import as it's not available
 from motor.motor_asyncio import AsyncIOMotorClient
 import logging
-import requests
+import httpx
+
+from .http_client_registry import http_clients
 
 logger = logging.getLogger(__name__)
 
+# GA4 Measurement Protocol collect URL (overridable to point at a local mock)
+GA4_ENDPOINT = os.getenv('GA4_ENDPOINT', 'https://www.google-analytics.com/mp/collect')
+http_clients.register("ga4", timeout=httpx.Timeout(5.0), max_connections=10, max_keepalive=5)
+
 class AnalyticsService:
     """
     Comprehensive analytics service for tracking user behavior,
@@ -97,7 +103,7 @@ class AnalyticsService:
             if self.ga4_client is not None:
                 try:
                     # Using direct GA4 Measurement Protocol API
-                    ga4_endpoint = f"https://www.google-analytics.com/mp/collect?measurement_id={self.ga4_client['measurement_id']}&api_secret={self.ga4_client['api_secret']}"
+                    ga4_endpoint = f"{GA4_ENDPOINT}?measurement_id={self.ga4_client['measurement_id']}&api_secret={self.ga4_client['api_secret']}"
                     
                     ga4_payload = {
                         "client_id": event_data['client_id'],
@@ -126,12 +132,7 @@ class AnalyticsService:
     async def _send_ga4_event(self, endpoint: str, payload: Dict):
         """Helper method to send events to GA4 asynchronously"""
         try:
-            # Using requests in a non-blocking way
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, 
-                lambda: requests.post(endpoint, json=payload, timeout=5)
-            )
+            await http_clients.get("ga4").post(endpoint, json=payload)
         except Exception as e:
             logger.error(f"GA4 API request failed: {e}")
             logger.error(f"Event tracking failed: {e}")
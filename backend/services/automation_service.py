@@ -1,4 +1,3 @@
-import aiohttp
 import json
 import logging
 from typing import Dict, Any, List, Optional
@@ -9,6 +8,7 @@ from ..models.user import User
 from ..models.wallet import HappyPaisaTransaction
 from .database import get_collection
 from .wallet_service import WalletService
+from .http_client_registry import http_clients
 from bson import ObjectId
 
 logger = logging.getLogger(__name__)
@@ -274,19 +274,18 @@ class AutomationService:
             if AutomationService.N8N_API_KEY:
                 headers["Authorization"] = f"Bearer {AutomationService.N8N_API_KEY}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    webhook_url,
-                    data=json.dumps(payload, default=json_serializer),
-                    headers=headers,
-                    timeout=30
-                ) as response:
-                    success = response.status == 200
-                    if not success:
-                        logger.error(f"n8n webhook failed: {response.status} - {await response.text()}")
-                    else:
-                        logger.info(f"n8n webhook success: {workflow_type}")
-                    return success
+            response = await http_clients.get("n8n").post(
+                webhook_url,
+                content=json.dumps(payload, default=json_serializer),
+                headers=headers,
+                timeout=30
+            )
+            success = response.status_code == 200
+            if not success:
+                logger.error(f"n8n webhook failed: {response.status_code} - {response.text}")
+            else:
+                logger.info(f"n8n webhook success: {workflow_type}")
+            return success
                     
         except Exception as e:
             logger.error(f"Failed to trigger n8n workflow: {e}")
@@ -495,12 +494,11 @@ class AutomationService:
         Test connection to n8n instance
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{AutomationService.N8N_BASE_URL}/healthz",
-                    timeout=10
-                ) as response:
-                    return response.status == 200
+            response = await http_clients.get("n8n").get(
+                f"{AutomationService.N8N_BASE_URL}/healthz",
+                timeout=10
+            )
+            return response.status_code == 200
                     
         except Exception:
             return False
@@ -519,4 +517,7 @@ class AutomationService:
         Execute backup and return results
         """
         response = await AutomationService._execute_backup(trigger)
-        return response.result or {}
\ No newline at end of file
+        return response.result or {}
+
+# Pooled client for n8n webhooks and health checks
+http_clients.register("n8n", base_url=AutomationService.N8N_BASE_URL, max_connections=20, max_keepalive=10)
@@ -0,0 +1,137 @@
+"""
+Happy Paisa Block Explorer Service
+In-memory block store with number/hash/address indexes backing the explorer endpoints
+"""
+from collections import deque
+from itertools import islice
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ChainBlock:
+    """Represents a sealed block on the Happy Paisa chain"""
+    number: int
+    hash: str
+    parent_hash: str
+    timestamp: datetime
+    extrinsics: List[str] = field(default_factory=list)  # tx hashes in inclusion order
+    validator: str = ""
+    inner_calls: List[str] = field(default_factory=list)  # batch inner call hashes, in inclusion order
+    merkle_root: str = ""  # over extrinsics followed by inner_calls
+
+    @property
+    def leaf_order(self) -> List[str]:
+        """Transaction hashes in the order they are committed to by merkle_root"""
+        return self.extrinsics + self.inner_calls
+
+    def to_dict(self):
+        return {
+            "block_number": self.number,
+            "block_hash": self.hash,
+            "parent_hash": self.parent_hash,
+            "timestamp": self.timestamp.isoformat(),
+            "transactions_count": len(self.extrinsics),
+            "extrinsics": list(self.extrinsics),
+            "inner_calls": list(self.inner_calls),
+            "merkle_root": self.merkle_root,
+            "validator": self.validator
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChainBlock":
+        timestamp = data["timestamp"]
+        return cls(
+            number=data["block_number"],
+            hash=data["block_hash"],
+            parent_hash=data["parent_hash"],
+            timestamp=timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(timestamp),
+            extrinsics=list(data.get("extrinsics", [])),
+            validator=data.get("validator", ""),
+            inner_calls=list(data.get("inner_calls", [])),
+            merkle_root=data.get("merkle_root", "")
+        )
+
+class BlockExplorerIndex:
+    """
+    Explorer data layer for the chain.
+    Keeps a ring buffer of recent blocks for the latest-blocks view and
+    dict indexes so block number, block hash, tx hash and address lookups are O(1).
+    """
+
+    def __init__(self, recent_capacity: int = 256):
+        self.recent_blocks: Deque[ChainBlock] = deque(maxlen=recent_capacity)
+        self.blocks_by_number: Dict[int, ChainBlock] = {}
+        self.blocks_by_hash: Dict[str, ChainBlock] = {}
+        self.tx_block_numbers: Dict[str, int] = {}  # tx_hash -> including block number
+        # address -> tx hashes, oldest first; dict keys give ordered iteration and O(1) removal
+        self.address_transactions: Dict[str, Dict[str, None]] = {}
+
+    def index_transaction(self, tx_hash: str, from_address: str, to_address: str):
+        """Register a submitted transaction against both of its addresses"""
+        self.address_transactions.setdefault(from_address, {})[tx_hash] = None
+        if to_address and to_address != from_address:
+            self.address_transactions.setdefault(to_address, {})[tx_hash] = None
+
+    def forget_transaction(self, tx_hash: str, from_address: str, to_address: str):
+        """Drop an archived transaction from the in-memory indexes"""
+        self.tx_block_numbers.pop(tx_hash, None)
+        for address in (from_address, to_address):
+            hashes = self.address_transactions.get(address)
+            if not hashes:
+                continue
+            hashes.pop(tx_hash, None)
+            if not hashes:
+                del self.address_transactions[address]
+
+    def add_block(self, block: ChainBlock, inner_calls: Iterable[str] = ()):
+        """Index a newly sealed block, including the inner calls of any batch extrinsics"""
+        self.recent_blocks.append(block)
+        self.blocks_by_number[block.number] = block
+        self.blocks_by_hash[block.hash] = block
+        for tx_hash in block.extrinsics:
+            self.tx_block_numbers[tx_hash] = block.number
+        for tx_hash in inner_calls:
+            self.tx_block_numbers[tx_hash] = block.number
+
+    def evict_block(self, number: int) -> Optional[ChainBlock]:
+        """Remove a block from the number/hash indexes once it leaves the retention window"""
+        block = self.blocks_by_number.pop(number, None)
+        if block is not None:
+            self.blocks_by_hash.pop(block.hash, None)
+        return block
+
+    def latest_blocks(self, limit: int = 10) -> List[ChainBlock]:
+        """Most recent blocks, newest first"""
+        limit = min(limit, len(self.recent_blocks))
+        return [self.recent_blocks[-i] for i in range(1, limit + 1)]
+
+    def get_block_by_number(self, number: int) -> Optional[ChainBlock]:
+        return self.blocks_by_number.get(number)
+
+    def get_block_by_hash(self, block_hash: str) -> Optional[ChainBlock]:
+        return self.blocks_by_hash.get(block_hash)
+
+    def get_transaction_block(self, tx_hash: str) -> Optional[ChainBlock]:
+        """Block that included a transaction, if it has been sealed"""
+        number = self.tx_block_numbers.get(tx_hash)
+        return self.blocks_by_number.get(number) if number is not None else None
+
+    def get_address_transaction_hashes(self, address: str, limit: int = 50) -> List[str]:
+        """Transaction hashes touching an address, newest first"""
+        hashes = self.address_transactions.get(address, ())
+        return list(islice(reversed(hashes), max(limit, 0)))
+
+    def has_address(self, address: str) -> bool:
+        return address in self.address_transactions
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "indexed_blocks": len(self.blocks_by_number),
+            "recent_blocks_buffered": len(self.recent_blocks),
+            "indexed_transactions": len(self.tx_block_numbers),
+            "indexed_addresses": len(self.address_transactions)
+        }
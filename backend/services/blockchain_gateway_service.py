@@ -6,14 +6,25 @@ import asyncio
 import hashlib
 import json
 import secrets
+import sys
 import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Any, Tuple
 from enum import Enum
 import logging
 
 from ..services.database import get_collection
+from ..services.address_registry_service import UserAddressRegistry, BlockchainAddress
+from ..services.block_explorer_service import BlockExplorerIndex, ChainBlock
+from ..services.chain_event_service import ChainEventBus, BLOCKS_TOPIC, tx_topic, address_topic
+from ..services.chain_archive_service import ChainArchive
+from ..services.chain_mempool_service import ChainMempool, MempoolLane
+from ..services.chain_merkle_service import (
+    HASH_ALGORITHM, LEAF_ENCODING, NODE_ENCODING, leaf_hash, merkle_root, merkle_proof
+)
+from ..services.currency_units import HP_DECIMALS, hp_to_planck, planck_to_hp, planck_to_inr, stored_planck, to_decimal128
 from ..models.user import User
 
 logger = logging.getLogger(__name__)
@@ -22,6 +33,7 @@ class TransactionType(str, Enum):
     MINT = "mint"
     BURN = "burn"
     TRANSFER = "transfer"
+    BATCH = "batch"
     
 class TransactionStatus(str, Enum):
     PENDING = "pending"
@@ -35,35 +47,30 @@ class ChainStatus(str, Enum):
     SYNCING = "syncing"
     ERROR = "error"
 
-@dataclass
-class BlockchainAddress:
-    """Represents a Substrate address"""
-    address: str
-    public_key: str
-    network: str = "happy-paisa-chain"
-    
-    def to_dict(self):
-        return {
-            "address": self.address,
-            "public_key": self.public_key,
-            "network": self.network
-        }
-
-@dataclass
 class ChainTransaction:
-    """Represents a blockchain transaction (extrinsic)"""
-    hash: str
-    block_number: Optional[int]
-    block_hash: Optional[str]
-    transaction_type: TransactionType
-    from_address: str
-    to_address: str
-    amount_hp: float
-    amount_planck: int  # Smallest unit on chain (1 HP = 1_000_000_000_000 planck)
-    status: TransactionStatus
-    timestamp: datetime
-    gas_fee: float = 0.0
-    metadata: Dict[str, Any] = None
+    """Represents a blockchain transaction (extrinsic); __slots__ keeps retained records compact"""
+    __slots__ = (
+        "hash", "block_number", "block_hash", "transaction_type", "from_address", "to_address",
+        "amount_planck", "status", "timestamp", "gas_fee", "metadata", "nonce"
+    )
+    
+    def __init__(self, hash: str, block_number: Optional[int], block_hash: Optional[str],
+                 transaction_type: TransactionType, from_address: str, to_address: str,
+                 amount_planck: int, status: TransactionStatus,
+                 timestamp: datetime, gas_fee: float = 0.0, metadata: Dict[str, Any] = None,
+                 nonce: Optional[int] = None):
+        self.hash = hash
+        self.block_number = block_number
+        self.block_hash = block_hash
+        self.transaction_type = transaction_type
+        self.from_address = from_address
+        self.to_address = to_address
+        self.amount_planck = amount_planck  # Smallest unit on chain (1 HP = 1_000_000_000_000 planck)
+        self.status = status
+        self.timestamp = timestamp
+        self.gas_fee = gas_fee
+        self.metadata = metadata or None  # Empty metadata isn't stored
+        self.nonce = nonce  # Sender's account nonce; inner batch calls have none
     
     def to_dict(self):
         return {
@@ -73,13 +80,45 @@ class ChainTransaction:
             "transaction_type": self.transaction_type,
             "from_address": self.from_address,
             "to_address": self.to_address,
-            "amount_hp": self.amount_hp,
+            "amount_hp": planck_to_hp(self.amount_planck),
             "amount_planck": self.amount_planck,
             "status": self.status,
             "timestamp": self.timestamp.isoformat(),
             "gas_fee": self.gas_fee,
+            "nonce": self.nonce,
             "metadata": self.metadata or {}
         }
+    
+    def merkle_leaf(self) -> bytes:
+        return leaf_hash(
+            self.hash, TransactionType(self.transaction_type).value,
+            self.from_address, self.to_address, self.amount_planck
+        )
+    
+    def to_archive_record(self) -> Dict[str, Any]:
+        record = self.to_dict()
+        record["_id"] = self.hash
+        record["timestamp"] = self.timestamp
+        record["amount_planck"] = to_decimal128(self.amount_planck)
+        return record
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChainTransaction":
+        timestamp = data["timestamp"]
+        return cls(
+            hash=data["hash"],
+            block_number=data.get("block_number"),
+            block_hash=data.get("block_hash"),
+            transaction_type=TransactionType(data["transaction_type"]),
+            from_address=data["from_address"],
+            to_address=data["to_address"],
+            amount_planck=stored_planck(data["amount_planck"]),
+            status=TransactionStatus(data["status"]),
+            timestamp=timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(timestamp),
+            gas_fee=data.get("gas_fee", 0.0),
+            metadata=data.get("metadata"),
+            nonce=data.get("nonce")
+        )
 
 class MockSubstrateChain:
     """
@@ -89,17 +128,40 @@ class MockSubstrateChain:
     
     def __init__(self):
         self.current_block = 1000000  # Starting block number
+        self.genesis_block = self.current_block
+        self.started_at = datetime.utcnow()
+        self.session_id = secrets.token_hex(8)  # The mock chain's state is lost whenever the process restarts
         self.chain_id = "happy-paisa-mainnet"
-        self.decimals = 12  # 1 HP = 10^12 planck units
+        self.decimals = HP_DECIMALS  # 1 HP = 10^12 planck units
         self.symbol = "HP"
         self.balances = {}  # address -> balance in planck
+        self.reserved = {}  # address -> planck held by pending outgoing extrinsics
         self.transactions = {}  # tx_hash -> transaction
-        self.pending_transactions = []
+        self.mempool = ChainMempool()
+        self.nonces = {}  # address -> next account nonce
+        self.base_fee_planck = hp_to_planck(0.001)  # Fixed base fee for demo; tips raise priority
+        self.batch_calls = {}  # batch tx_hash -> inner call tx hashes
         self.block_time = 6  # 6 second block time like Polkadot
         
         # Axzora operational addresses
         self.treasury_address = "5FHneW46xGXgs5mUiveU4sbTyGBzmstUspZC92UhjJM694ty"
         self.mint_authority = "5FHneW46xGXgs5mUiveU4sbTyGBzmstUspZC92UhjJM694ty"
+        self.validator_address = "5FHneW46xGXgs5mUiveU4sbTyGBzmstUspZC92UhjJM694ty"
+        
+        # Sealed blocks and explorer indexes
+        self.explorer = BlockExplorerIndex()
+        self.events = ChainEventBus()
+        self.latest_block_hash = f"0x{self.current_block:064x}"
+        self._block_producer: Optional[asyncio.Task] = None
+        
+        # Only the most recent blocks' transactions stay in memory; older ones are archived
+        self.retention_blocks = 1000
+        self.archive = ChainArchive()
+        self._retained_blocks: Deque[Tuple[int, List[str]]] = deque()  # (block number, processed tx hashes)
+        
+        # Merkle leaves of recently sealed blocks, so proofs for fresh payments need no rehashing
+        self.leaf_cache_capacity = 64
+        self._leaf_cache: "OrderedDict[int, List[bytes]]" = OrderedDict()
         
     async def get_chain_info(self) -> Dict[str, Any]:
         """Get basic chain information"""
@@ -111,121 +173,487 @@ class MockSubstrateChain:
             "blockTime": self.block_time,
             "status": ChainStatus.CONNECTED,
             "treasuryAddress": self.treasury_address,
-            "totalSupply": sum(self.balances.values()) / (10 ** self.decimals)
+            "totalSupply": planck_to_hp(sum(self.balances.values())),
+            "totalSupplyPlanck": sum(self.balances.values())
         }
     
     async def get_balance(self, address: str) -> Dict[str, Any]:
-        """Get account balance"""
+        """Get account balance, including the amount reserved by pending extrinsics"""
         balance_planck = self.balances.get(address, 0)
-        balance_hp = balance_planck / (10 ** self.decimals)
+        reserved_planck = self.reserved.get(address, 0)
         
         return {
             "address": address,
             "balance_planck": balance_planck,
-            "balance_hp": balance_hp,
-            "balance_inr_equiv": balance_hp * 1000,
-            "nonce": 0,  # Simplified
+            "balance_hp": planck_to_hp(balance_planck),
+            "balance_inr_equiv": planck_to_inr(balance_planck),
+            "reserved_planck": reserved_planck,
+            "spendable_planck": balance_planck - reserved_planck,
+            "spendable_hp": planck_to_hp(balance_planck - reserved_planck),
+            "nonce": self.nonces.get(address, 0),
             "is_active": balance_planck > 0
         }
     
+    def _spendable(self, address: str) -> int:
+        """Balance minus what pending outgoing extrinsics have already reserved"""
+        return self.balances.get(address, 0) - self.reserved.get(address, 0)
+    
+    def _reserve(self, outgoing: Dict[str, int]):
+        """Reserve outgoing amounts for pending extrinsics, rejecting overspends up front"""
+        for address, amount_planck in outgoing.items():
+            spendable = self._spendable(address)
+            if spendable < amount_planck:
+                raise ValueError(f"Insufficient balance. Available: {planck_to_hp(spendable)} HP")
+        for address, amount_planck in outgoing.items():
+            self.reserved[address] = self.reserved.get(address, 0) + amount_planck
+    
+    def _release(self, address: str, amount_planck: int):
+        """Release a reservation once its extrinsic is included or fails"""
+        remaining = self.reserved.get(address, 0) - amount_planck
+        if remaining > 0:
+            self.reserved[address] = remaining
+        else:
+            self.reserved.pop(address, None)
+    
+    def _next_nonce(self, address: str) -> int:
+        nonce = self.nonces.get(address, 0)
+        self.nonces[address] = nonce + 1
+        return nonce
+    
+    @staticmethod
+    def _default_lane(transaction_type: TransactionType) -> MempoolLane:
+        return MempoolLane.USER_TRANSFER if transaction_type == TransactionType.TRANSFER else MempoolLane.GENERAL
+    
     async def submit_extrinsic(self, extrinsic_data: Dict[str, Any]) -> str:
-        """Submit a transaction to the chain"""
+        """Submit a transaction to the chain's mempool ("lane" and "tip_planck" are optional)"""
         tx_hash = f"0x{secrets.token_hex(32)}"
+        transaction_type = TransactionType(extrinsic_data["type"])
+        amount_planck = int(extrinsic_data["amount_planck"])
+        if amount_planck <= 0:
+            raise ValueError("Amount must be positive")
+        from_address, to_address = extrinsic_data["from"], extrinsic_data["to"]
+        fee_planck = self.base_fee_planck + int(extrinsic_data.get("tip_planck", 0))
+        lane = MempoolLane(extrinsic_data.get("lane") or self._default_lane(transaction_type))
         
-        # Create transaction
-        transaction = ChainTransaction(
-            hash=tx_hash,
-            block_number=None,  # Will be set when included in block
-            block_hash=None,
-            transaction_type=TransactionType(extrinsic_data["type"]),
-            from_address=extrinsic_data["from"],
-            to_address=extrinsic_data["to"],
-            amount_hp=extrinsic_data["amount_hp"],
-            amount_planck=int(extrinsic_data["amount_hp"] * (10 ** self.decimals)),
-            status=TransactionStatus.PENDING,
-            timestamp=datetime.utcnow(),
-            gas_fee=0.001,  # Fixed gas fee for demo
-            metadata=extrinsic_data.get("metadata", {})
-        )
+        # Validate against spendable balance before accepting into the pending pool
+        reserved = transaction_type in (TransactionType.BURN, TransactionType.TRANSFER)
+        if reserved:
+            self._reserve({from_address: amount_planck})
         
-        self.transactions[tx_hash] = transaction
-        self.pending_transactions.append(tx_hash)
+        try:
+            # Create transaction
+            transaction = ChainTransaction(
+                hash=tx_hash,
+                block_number=None,  # Will be set when included in block
+                block_hash=None,
+                transaction_type=transaction_type,
+                from_address=from_address,
+                to_address=to_address,
+                amount_planck=amount_planck,
+                status=TransactionStatus.PENDING,
+                timestamp=datetime.utcnow(),
+                gas_fee=planck_to_hp(fee_planck),
+                metadata=extrinsic_data.get("metadata", {}),
+                nonce=self._next_nonce(from_address)
+            )
+            
+            self.transactions[tx_hash] = transaction
+            self.mempool.add(tx_hash, from_address, transaction.nonce, lane, fee_planck)
+        except BaseException:
+            # A rejected extrinsic must not keep the sender's balance reserved
+            self.transactions.pop(tx_hash, None)
+            if reserved:
+                self._release(from_address, amount_planck)
+            raise
+        self.explorer.index_transaction(tx_hash, from_address, to_address)
         
-        # Simulate block inclusion after a delay
-        asyncio.create_task(self._process_pending_transaction(tx_hash))
+        # Block inclusion happens on the next produced block
+        self._ensure_block_producer()
         
         logger.info(f"Submitted extrinsic {tx_hash} of type {transaction.transaction_type}")
         return tx_hash
     
-    async def _process_pending_transaction(self, tx_hash: str):
-        """Process a pending transaction (simulate block inclusion)"""
-        # Wait for block time
-        await asyncio.sleep(self.block_time)
+    async def submit_batch_extrinsic(self, batch_type: TransactionType, calls: List[Dict[str, Any]],
+                                     metadata: Dict[str, Any] = None, lane: MempoolLane = None,
+                                     tip_planck: int = 0) -> Tuple[str, List[str]]:
+        """
+        Submit many calls as one batch extrinsic (like utility.batch_all).
+        All calls are included in the same block and applied atomically:
+        if any call fails, none of them take effect.
+        """
+        if not calls:
+            raise ValueError("Batch must contain at least one call")
+        # Every call counts against block capacity, and a batch must fit in one block
+        if len(calls) > self.mempool.max_weight:
+            raise ValueError(f"Batch exceeds maximum of {self.mempool.max_weight} calls per block")
         
-        if tx_hash not in self.transactions:
-            return
-            
-        transaction = self.transactions[tx_hash]
+        # Parse every call before anything is reserved
+        parsed = []
+        for call in calls:
+            amount_planck = int(call["amount_planck"])
+            if amount_planck <= 0:
+                raise ValueError("Amount must be positive")
+            parsed.append((TransactionType(call["type"]), call["from"], call["to"], amount_planck))
+        batch_type = TransactionType(batch_type)
+        lane = MempoolLane(lane or MempoolLane.GENERAL)
+        fee_planck = self.base_fee_planck + int(tip_planck)
+        
+        batch_hash = f"0x{secrets.token_hex(32)}"
+        timestamp = datetime.utcnow()
+        
+        # Reserve every sender's outgoing total so the whole batch is accepted or rejected
+        outgoing = {}
+        for call_type, from_address, _, amount_planck in parsed:
+            if call_type in (TransactionType.BURN, TransactionType.TRANSFER):
+                outgoing[from_address] = outgoing.get(from_address, 0) + amount_planck
+        self._reserve(outgoing)
+        call_hashes = []
+        total_planck = 0
         
         try:
-            # Validate and execute transaction
-            if transaction.transaction_type == TransactionType.MINT:
-                # Mint new tokens to treasury/target address
+            for index, (call, (call_type, from_address, to_address, amount_planck)) in enumerate(zip(calls, parsed)):
+                # Inner calls are identified by batch hash and call index
+                call_hash = "0x" + hashlib.blake2b(f"{batch_hash}:{index}".encode(), digest_size=32).hexdigest()
+                call_metadata = dict(call.get("metadata") or {})
+                call_metadata["batch_hash"] = batch_hash
+                
+                self.transactions[call_hash] = ChainTransaction(
+                    hash=call_hash,
+                    block_number=None,
+                    block_hash=None,
+                    transaction_type=call_type,
+                    from_address=from_address,
+                    to_address=to_address,
+                    amount_planck=amount_planck,
+                    status=TransactionStatus.PENDING,
+                    timestamp=timestamp,
+                    gas_fee=0.0,  # Fee is charged once on the batch
+                    metadata=call_metadata
+                )
+                call_hashes.append(call_hash)
+                total_planck += amount_planck
+            
+            batch_metadata = dict(metadata or {})
+            batch_metadata.update({"batch_type": batch_type.value, "call_count": len(calls)})
+            
+            self.transactions[batch_hash] = ChainTransaction(
+                hash=batch_hash,
+                block_number=None,
+                block_hash=None,
+                transaction_type=TransactionType.BATCH,
+                from_address=calls[0]["from"],
+                to_address="",
+                amount_planck=total_planck,
+                status=TransactionStatus.PENDING,
+                timestamp=timestamp,
+                gas_fee=planck_to_hp(fee_planck),
+                metadata=batch_metadata,
+                nonce=self._next_nonce(calls[0]["from"])
+            )
+            # A batch occupies block capacity for every call it carries
+            self.mempool.add(
+                batch_hash, calls[0]["from"], self.transactions[batch_hash].nonce,
+                lane, fee_planck, weight=len(calls)
+            )
+        except BaseException:
+            # A rejected batch must not keep any sender's balance reserved
+            for tx_hash in [*call_hashes, batch_hash]:
+                self.transactions.pop(tx_hash, None)
+            for address, amount_planck in outgoing.items():
+                self._release(address, amount_planck)
+            raise
+        self.batch_calls[batch_hash] = call_hashes
+        for call_hash, (_, from_address, to_address, _) in zip(call_hashes, parsed):
+            self.explorer.index_transaction(call_hash, from_address, to_address)
+        self.explorer.index_transaction(batch_hash, calls[0]["from"], "")
+        
+        self._ensure_block_producer()
+        
+        logger.info(f"Submitted batch extrinsic {batch_hash} with {len(calls)} {batch_type.value} calls")
+        return batch_hash, call_hashes
+    
+    def _ensure_block_producer(self):
+        """Start the block producer if it is not already running"""
+        if self._block_producer is None or self._block_producer.done():
+            self._block_producer = asyncio.create_task(self._run_block_producer())
+    
+    async def wait_for_inclusion(self):
+        """Wait until every pending extrinsic has been included in a block"""
+        while self._block_producer is not None and not self._block_producer.done():
+            await self._block_producer
+    
+    async def _run_block_producer(self):
+        """Seal a block every block_time while the mempool has pending extrinsics"""
+        while self.mempool:
+            await asyncio.sleep(self.block_time)
+            self._produce_block()
+    
+    def _apply_transaction(self, transaction: ChainTransaction):
+        """Apply a transaction's balance changes, raising if it cannot be executed"""
+        if transaction.transaction_type == TransactionType.MINT:
+            # Mint new tokens to treasury/target address
+            self.balances[transaction.to_address] = (
+                self.balances.get(transaction.to_address, 0) + transaction.amount_planck
+            )
+            
+        elif transaction.transaction_type == TransactionType.BURN:
+            # Burn tokens from address
+            current_balance = self.balances.get(transaction.from_address, 0)
+            if current_balance >= transaction.amount_planck:
+                self.balances[transaction.from_address] = current_balance - transaction.amount_planck
+            else:
+                raise ValueError("Insufficient balance for burn")
+                
+        elif transaction.transaction_type == TransactionType.TRANSFER:
+            # Transfer between addresses
+            from_balance = self.balances.get(transaction.from_address, 0)
+            if from_balance >= transaction.amount_planck:
+                self.balances[transaction.from_address] = from_balance - transaction.amount_planck
                 self.balances[transaction.to_address] = (
                     self.balances.get(transaction.to_address, 0) + transaction.amount_planck
                 )
-                
-            elif transaction.transaction_type == TransactionType.BURN:
-                # Burn tokens from address
-                current_balance = self.balances.get(transaction.from_address, 0)
-                if current_balance >= transaction.amount_planck:
-                    self.balances[transaction.from_address] = current_balance - transaction.amount_planck
-                else:
-                    raise ValueError("Insufficient balance for burn")
-                    
-            elif transaction.transaction_type == TransactionType.TRANSFER:
-                # Transfer between addresses
-                from_balance = self.balances.get(transaction.from_address, 0)
-                if from_balance >= transaction.amount_planck:
-                    self.balances[transaction.from_address] = from_balance - transaction.amount_planck
-                    self.balances[transaction.to_address] = (
-                        self.balances.get(transaction.to_address, 0) + transaction.amount_planck
-                    )
-                else:
-                    raise ValueError("Insufficient balance for transfer")
+            else:
+                raise ValueError("Insufficient balance for transfer")
+    
+    def _apply_batch(self, batch: ChainTransaction):
+        """Apply every call of a batch atomically, raising without side effects if any call fails"""
+        staged = {}
+        for call_hash in self.batch_calls.get(batch.hash, []):
+            call = self.transactions[call_hash]
+            if call.transaction_type in (TransactionType.BURN, TransactionType.TRANSFER):
+                from_balance = staged.get(call.from_address, self.balances.get(call.from_address, 0))
+                if from_balance < call.amount_planck:
+                    raise ValueError(f"Insufficient balance for batch call {call_hash}")
+                staged[call.from_address] = from_balance - call.amount_planck
+            if call.transaction_type in (TransactionType.MINT, TransactionType.TRANSFER):
+                staged[call.to_address] = (
+                    staged.get(call.to_address, self.balances.get(call.to_address, 0)) + call.amount_planck
+                )
+        self.balances.update(staged)
+    
+    def _produce_block(self) -> Optional[ChainBlock]:
+        """Fill a new block from the mempool's highest-priority extrinsics (simulated block production)"""
+        pending = self.mempool.select_block()
+        if not pending:
+            return None
+        
+        block_number = self.current_block + 1
+        included = []
+        inner_calls = []
+        processed = []
+        
+        for tx_hash in pending:
+            transaction = self.transactions.get(tx_hash)
+            if transaction is None:
+                continue
             
-            # Update transaction status
-            self.current_block += 1
-            transaction.block_number = self.current_block
-            transaction.block_hash = f"0x{secrets.token_hex(32)}"
-            transaction.status = TransactionStatus.CONFIRMED
+            call_hashes = self.batch_calls.get(tx_hash, [])
+            affected = [transaction] + [self.transactions[h] for h in call_hashes]
+            processed.append(tx_hash)
+            processed.extend(call_hashes)
             
-            # Remove from pending
-            if tx_hash in self.pending_transactions:
-                self.pending_transactions.remove(tx_hash)
-                
-            logger.info(f"Transaction {tx_hash} confirmed in block {self.current_block}")
+            # Inclusion settles the reservation whether the extrinsic succeeds or fails
+            for tx in affected:
+                if tx.transaction_type in (TransactionType.BURN, TransactionType.TRANSFER):
+                    self._release(tx.from_address, tx.amount_planck)
             
-        except Exception as e:
-            transaction.status = TransactionStatus.FAILED
-            transaction.metadata = transaction.metadata or {}
-            transaction.metadata["error"] = str(e)
-            logger.error(f"Transaction {tx_hash} failed: {e}")
+            try:
+                if transaction.transaction_type == TransactionType.BATCH:
+                    self._apply_batch(transaction)
+                else:
+                    self._apply_transaction(transaction)
+                for tx in affected:
+                    tx.block_number = block_number
+                    tx.status = TransactionStatus.CONFIRMED
+                included.append(tx_hash)
+                inner_calls.extend(call_hashes)
+            except Exception as e:
+                for tx in affected:
+                    tx.status = TransactionStatus.FAILED
+                    tx.metadata = tx.metadata or {}
+                    tx.metadata["error"] = str(e)
+                logger.error(f"Transaction {tx_hash} failed: {e}")
+        
+        leaves = [self.transactions[tx_hash].merkle_leaf() for tx_hash in included + inner_calls]
+        block = ChainBlock(
+            number=block_number,
+            hash="",
+            parent_hash=self.latest_block_hash,
+            timestamp=datetime.utcnow(),
+            extrinsics=included,
+            validator=self.validator_address,
+            inner_calls=inner_calls,
+            merkle_root=merkle_root(leaves)
+        )
+        # The block hash commits to the header, and through merkle_root to every extrinsic,
+        # so it can only be set on the included transactions once they are all known
+        header = f"{block.number}|{block.parent_hash}|{block.timestamp.isoformat()}|{block.merkle_root}|{block.validator}"
+        block.hash = "0x" + hashlib.blake2b(header.encode(), digest_size=32).hexdigest()
+        for tx_hash in included + inner_calls:
+            self.transactions[tx_hash].block_hash = block.hash
+        self._remember_leaves(block_number, leaves)
+        
+        self.current_block = block_number
+        self.latest_block_hash = block.hash
+        self.explorer.add_block(block, inner_calls)
+        self._publish_block_events(block, processed)
+        
+        self._retained_blocks.append((block_number, processed))
+        self._enforce_retention()
+        
+        logger.info(f"Sealed block {block_number} with {len(included)} extrinsics ({len(pending) - len(included)} failed)")
+        return block
+    
+    def _publish_block_events(self, block: ChainBlock, processed: List[str]):
+        """Notify subscribers of the new block, tx status changes and touched balances"""
+        events = self.events
+        if events.has_subscribers(BLOCKS_TOPIC):
+            events.publish(BLOCKS_TOPIC, "new_block", block.to_dict())
+        
+        touched_addresses = set()
+        for tx_hash in processed:
+            transaction = self.transactions.get(tx_hash)
+            if transaction is None:
+                continue
+            if events.has_subscribers(tx_topic(tx_hash)):
+                events.publish(tx_topic(tx_hash), "tx_status", transaction.to_dict())
+            if transaction.status == TransactionStatus.CONFIRMED:
+                touched_addresses.add(transaction.from_address)
+                touched_addresses.add(transaction.to_address)
+        
+        touched_addresses.discard("")
+        for address in touched_addresses:
+            if events.has_subscribers(address_topic(address)):
+                balance_planck = self.balances.get(address, 0)
+                events.publish(address_topic(address), "balance", {
+                    "address": address,
+                    "balance_planck": balance_planck,
+                    "balance_hp": planck_to_hp(balance_planck),
+                    "block_number": block.number
+                })
+    
+    def _remember_leaves(self, block_number: int, leaves: List[bytes]):
+        self._leaf_cache[block_number] = leaves
+        if len(self._leaf_cache) > self.leaf_cache_capacity:
+            self._leaf_cache.popitem(last=False)
+    
+    async def get_block_transactions(self, block: ChainBlock) -> List[ChainTransaction]:
+        """Every transaction committed to by a block (extrinsics, then inner calls), from memory or the archive"""
+        transactions = {
+            tx_hash: self.transactions[tx_hash]
+            for tx_hash in block.leaf_order if tx_hash in self.transactions
+        }
+        if len(transactions) < len(block.leaf_order):
+            for record in await self.archive.get_block_transactions(block.number):
+                transactions.setdefault(record["hash"], ChainTransaction.from_dict(record))
+        
+        missing = [tx_hash for tx_hash in block.leaf_order if tx_hash not in transactions]
+        if missing:
+            raise ValueError(f"Block {block.number} is missing {len(missing)} of its transactions")
+        return [transactions[tx_hash] for tx_hash in block.leaf_order]
+    
+    async def _get_block_leaves(self, block: ChainBlock) -> List[bytes]:
+        """Merkle leaves of a block, rebuilt from retained or archived transactions when not cached"""
+        leaves = self._leaf_cache.get(block.number)
+        if leaves is not None:
+            return leaves
+        
+        leaves = [transaction.merkle_leaf() for transaction in await self.get_block_transactions(block)]
+        self._remember_leaves(block.number, leaves)
+        return leaves
+    
+    async def get_inclusion_proof(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Merkle path proving a confirmed transaction is committed to by its block's merkle root"""
+        transaction = await self.get_transaction(tx_hash)
+        if transaction is None or transaction.status != TransactionStatus.CONFIRMED:
+            return None
+        block = await self.get_block(str(transaction.block_number))
+        if block is None:
+            return None
+        
+        leaves = await self._get_block_leaves(block)
+        leaf_index = block.leaf_order.index(tx_hash)
+        return {
+            "transaction": transaction,
+            "block": block,
+            "leaf": "0x" + leaves[leaf_index].hex(),
+            "leaf_index": leaf_index,
+            "leaf_count": len(leaves),
+            "proof": merkle_proof(leaves, leaf_index)
+        }
+    
+    def _enforce_retention(self):
+        """Move transactions of blocks older than the retention window to the archive"""
+        while len(self._retained_blocks) > self.retention_blocks:
+            block_number, tx_hashes = self._retained_blocks.popleft()
+            block = self.explorer.evict_block(block_number)
+            
+            records = []
+            for tx_hash in tx_hashes:
+                transaction = self.transactions.pop(tx_hash, None)
+                if transaction is None:
+                    continue
+                self.batch_calls.pop(tx_hash, None)
+                self.explorer.forget_transaction(tx_hash, transaction.from_address, transaction.to_address)
+                records.append(transaction.to_archive_record())
+            
+            self.archive.add(block, records)
+    
+    def get_retention_stats(self) -> Dict[str, Any]:
+        """In-memory retention and archive statistics, with an estimate of bytes per retained transaction"""
+        sample = list(islice(self.transactions.values(), 200))
+        sample_bytes = sum(
+            sys.getsizeof(tx) + sys.getsizeof(tx.hash) + sys.getsizeof(tx.timestamp)
+            + (sys.getsizeof(tx.metadata) + sum(sys.getsizeof(v) for v in tx.metadata.values()) if tx.metadata else 0)
+            for tx in sample
+        )
+        return {
+            "retention_blocks": self.retention_blocks,
+            "retained_blocks": len(self._retained_blocks),
+            "retained_transactions": len(self.transactions),
+            "estimated_bytes_per_transaction": round(sample_bytes / len(sample), 1) if sample else 0.0,
+            "archive": self.archive.get_stats()
+        }
     
     async def get_transaction(self, tx_hash: str) -> Optional[ChainTransaction]:
-        """Get transaction by hash"""
-        return self.transactions.get(tx_hash)
+        """Get transaction by hash, falling back to the archive for old transactions"""
+        transaction = self.transactions.get(tx_hash)
+        if transaction is None:
+            record = await self.archive.get_transaction(tx_hash)
+            if record:
+                transaction = ChainTransaction.from_dict(record)
+        return transaction
     
     async def get_transactions_by_address(self, address: str, limit: int = 50) -> List[ChainTransaction]:
-        """Get transactions for an address"""
-        address_transactions = []
-        for tx in self.transactions.values():
-            if tx.from_address == address or tx.to_address == address:
-                address_transactions.append(tx)
-        
-        # Sort by timestamp, newest first
-        address_transactions.sort(key=lambda x: x.timestamp, reverse=True)
-        return address_transactions[:limit]
+        """Get transactions for an address, newest first"""
+        transactions = [
+            self.transactions[tx_hash]
+            for tx_hash in self.explorer.get_address_transaction_hashes(address, limit)
+            if tx_hash in self.transactions
+        ]
+        if len(transactions) < limit:
+            archived = await self.archive.get_transactions_by_address(address, limit - len(transactions))
+            transactions.extend(ChainTransaction.from_dict(record) for record in archived)
+        return transactions
+    
+    async def get_latest_blocks(self, limit: int = 10) -> List[ChainBlock]:
+        """Get the most recently sealed blocks, newest first"""
+        return self.explorer.latest_blocks(limit)
+    
+    async def get_block(self, block_id: str) -> Optional[ChainBlock]:
+        """Get a block by number or hash, falling back to the archive for old blocks"""
+        if block_id.isdigit():
+            block = self.explorer.get_block_by_number(int(block_id))
+            if block is None and int(block_id) <= self.current_block:
+                record = await self.archive.get_block(number=int(block_id))
+                block = ChainBlock.from_dict(record) if record else None
+            return block
+        
+        block = self.explorer.get_block_by_hash(block_id)
+        if block is None:
+            record = await self.archive.get_block(block_hash=block_id)
+            block = ChainBlock.from_dict(record) if record else None
+        return block
 
 class HappyPaisaBlockchainGateway:
     """
@@ -234,15 +662,24 @@ class HappyPaisaBlockchainGateway:
     
     def __init__(self):
         self.chain = MockSubstrateChain()
-        self.user_addresses = {}  # user_id -> BlockchainAddress
+        self.addresses = UserAddressRegistry()
         self._initialize_system_accounts()
     
     def _initialize_system_accounts(self):
         """Initialize system accounts with some balance"""
         # Set initial treasury balance
-        initial_supply_planck = int(1000000 * (10 ** self.chain.decimals))  # 1M HP
+        initial_supply_planck = hp_to_planck(1000000)  # 1M HP
         self.chain.balances[self.chain.treasury_address] = initial_supply_planck
     
+    async def initialize(self):
+        """Prepare persistent state on startup (indexes and warm address cache)"""
+        try:
+            await self.addresses.ensure_indexes()
+            await self.addresses.warm()
+            await self.chain.archive.ensure_indexes()
+        except Exception as e:
+            logger.error(f"Failed to initialize blockchain address registry: {e}")
+    
     async def get_chain_status(self) -> Dict[str, Any]:
         """Get blockchain network status"""
         chain_info = await self.chain.get_chain_info()
@@ -256,34 +693,17 @@ class HappyPaisaBlockchainGateway:
             "total_supply_hp": chain_info["totalSupply"]
         }
     
+    async def get_user_address(self, user_id: str) -> Optional[BlockchainAddress]:
+        """Blockchain address of a user, or None if they don't have one yet"""
+        return await self.addresses.get(user_id)
+    
     async def get_or_create_user_address(self, user_id: str) -> BlockchainAddress:
         """Get or create a blockchain address for a user"""
-        if user_id in self.user_addresses:
-            return self.user_addresses[user_id]
-        
-        # Generate new address (simplified - in production use proper key generation)
-        address = f"5{secrets.token_hex(24)}"
-        public_key = f"0x{secrets.token_hex(32)}"
-        
-        blockchain_address = BlockchainAddress(
-            address=address,
-            public_key=public_key
-        )
-        
-        self.user_addresses[user_id] = blockchain_address
-        
-        # Store in database
-        addresses_collection = await get_collection("blockchain_addresses")
-        await addresses_collection.insert_one({
-            "user_id": user_id,
-            "address": address,
-            "public_key": public_key,
-            "network": "happy-paisa-chain",
-            "created_at": datetime.utcnow()
-        })
-        
-        logger.info(f"Created blockchain address {address} for user {user_id}")
-        return blockchain_address
+        return await self.addresses.get_or_create(user_id)
+    
+    async def get_or_create_user_addresses(self, user_ids: List[str]) -> Dict[str, BlockchainAddress]:
+        """Resolve addresses for many users with one lookup query and one bulk upsert"""
+        return await self.addresses.get_many_or_create(user_ids)
     
     async def get_user_balance(self, user_id: str) -> Dict[str, Any]:
         """Get user's Happy Paisa balance on blockchain"""
@@ -296,79 +716,83 @@ class HappyPaisaBlockchainGateway:
             "balance_hp": balance_info["balance_hp"],
             "balance_inr_equiv": balance_info["balance_inr_equiv"],
             "balance_planck": balance_info["balance_planck"],
+            "spendable_hp": balance_info["spendable_hp"],
             "network": "happy-paisa-mainnet"
         }
     
-    async def mint_happy_paisa(self, user_id: str, amount_hp: float, reference_id: str = None) -> str:
+    async def mint_happy_paisa(self, user_id: str, amount_hp: float, reference_id: str = None,
+                               tip_planck: int = 0) -> str:
         """Mint new Happy Paisa tokens for a user (INR -> HP conversion)"""
         user_address = await self.get_or_create_user_address(user_id)
+        amount_planck = hp_to_planck(amount_hp)
         
         extrinsic_data = {
             "type": TransactionType.MINT,
             "from": self.chain.mint_authority,
             "to": user_address.address,
-            "amount_hp": amount_hp,
+            "amount_planck": amount_planck,
+            "tip_planck": tip_planck,
             "metadata": {
                 "user_id": user_id,
                 "reference_id": reference_id,
                 "conversion_rate": 1000,  # 1 HP = 1000 INR
-                "inr_amount": amount_hp * 1000
+                "inr_amount": planck_to_inr(amount_planck)
             }
         }
         
         tx_hash = await self.chain.submit_extrinsic(extrinsic_data)
         
         # Store transaction record
-        await self._store_transaction_record(tx_hash, user_id, TransactionType.MINT, amount_hp)
+        await self._store_transaction_record(tx_hash, user_id, TransactionType.MINT, amount_planck)
         
         logger.info(f"Minted {amount_hp} HP for user {user_id}, tx: {tx_hash}")
         return tx_hash
     
-    async def burn_happy_paisa(self, user_id: str, amount_hp: float, reference_id: str = None) -> str:
+    async def burn_happy_paisa(self, user_id: str, amount_hp: float, reference_id: str = None,
+                               lane: MempoolLane = None, tip_planck: int = 0) -> str:
         """Burn Happy Paisa tokens for a user (HP -> INR conversion)"""
         user_address = await self.get_or_create_user_address(user_id)
+        amount_planck = hp_to_planck(amount_hp)
         
-        # Check if user has sufficient balance
-        balance_info = await self.chain.get_balance(user_address.address)
-        if balance_info["balance_hp"] < amount_hp:
-            raise ValueError(f"Insufficient balance. Available: {balance_info['balance_hp']} HP")
-        
+        # Spendable balance (net of pending extrinsics) is checked by the chain on submission
         extrinsic_data = {
             "type": TransactionType.BURN,
             "from": user_address.address,
             "to": self.chain.treasury_address,  # Burned tokens go to treasury
-            "amount_hp": amount_hp,
+            "amount_planck": amount_planck,
+            "lane": lane,  # e.g. MempoolLane.CARD_SETTLEMENT for card payments
+            "tip_planck": tip_planck,
             "metadata": {
                 "user_id": user_id,
                 "reference_id": reference_id,
                 "conversion_rate": 1000,
-                "inr_amount": amount_hp * 1000
+                "inr_amount": planck_to_inr(amount_planck)
             }
         }
         
         tx_hash = await self.chain.submit_extrinsic(extrinsic_data)
         
         # Store transaction record
-        await self._store_transaction_record(tx_hash, user_id, TransactionType.BURN, amount_hp)
+        await self._store_transaction_record(tx_hash, user_id, TransactionType.BURN, amount_planck)
         
         logger.info(f"Burned {amount_hp} HP for user {user_id}, tx: {tx_hash}")
         return tx_hash
     
-    async def transfer_happy_paisa(self, from_user_id: str, to_user_id: str, amount_hp: float, description: str = None) -> str:
+    async def transfer_happy_paisa(self, from_user_id: str, to_user_id: str, amount_hp: float, description: str = None,
+                                   lane: MempoolLane = None, tip_planck: int = 0) -> str:
         """Transfer Happy Paisa between users on blockchain"""
         from_address = await self.get_or_create_user_address(from_user_id)
         to_address = await self.get_or_create_user_address(to_user_id)
+        amount_planck = hp_to_planck(amount_hp)
         
-        # Check balance
-        balance_info = await self.chain.get_balance(from_address.address)
-        if balance_info["balance_hp"] < amount_hp:
-            raise ValueError(f"Insufficient balance. Available: {balance_info['balance_hp']} HP")
-        
+        # Spendable balance (net of pending extrinsics) is checked by the chain on submission
         extrinsic_data = {
             "type": TransactionType.TRANSFER,
             "from": from_address.address,
             "to": to_address.address,
-            "amount_hp": amount_hp,
+            "amount_planck": amount_planck,
+            "lane": lane,
+            "tip_planck": tip_planck,
             "metadata": {
                 "from_user_id": from_user_id,
                 "to_user_id": to_user_id,
@@ -379,12 +803,99 @@ class HappyPaisaBlockchainGateway:
         tx_hash = await self.chain.submit_extrinsic(extrinsic_data)
         
         # Store transaction records for both users
-        await self._store_transaction_record(tx_hash, from_user_id, TransactionType.TRANSFER, -amount_hp)
-        await self._store_transaction_record(tx_hash, to_user_id, TransactionType.TRANSFER, amount_hp)
+        await self._store_transaction_record(tx_hash, from_user_id, TransactionType.TRANSFER, -amount_planck)
+        await self._store_transaction_record(tx_hash, to_user_id, TransactionType.TRANSFER, amount_planck)
         
         logger.info(f"Transferred {amount_hp} HP from {from_user_id} to {to_user_id}, tx: {tx_hash}")
         return tx_hash
     
+    async def batch_mint_happy_paisa(self, mints: List[Dict[str, Any]], reference_id: str = None) -> Dict[str, Any]:
+        """Mint Happy Paisa for many users in one batch extrinsic (airdrops, campaign payouts)"""
+        addresses = await self.get_or_create_user_addresses([mint["user_id"] for mint in mints])
+        amounts_planck = [hp_to_planck(mint["amount_hp"]) for mint in mints]
+        
+        calls = [
+            {
+                "type": TransactionType.MINT,
+                "from": self.chain.mint_authority,
+                "to": addresses[mint["user_id"]].address,
+                "amount_planck": amount_planck,
+                "metadata": {
+                    "user_id": mint["user_id"],
+                    "reference_id": mint.get("reference_id", reference_id),
+                    "conversion_rate": 1000,
+                    "inr_amount": planck_to_inr(amount_planck)
+                }
+            }
+            for mint, amount_planck in zip(mints, amounts_planck)
+        ]
+        
+        batch_hash, call_hashes = await self.chain.submit_batch_extrinsic(
+            TransactionType.MINT, calls, {"reference_id": reference_id}
+        )
+        
+        await self._store_transaction_records([
+            self._build_transaction_record(call_hash, mint["user_id"], TransactionType.MINT, amount_planck, batch_hash)
+            for call_hash, mint, amount_planck in zip(call_hashes, mints, amounts_planck)
+        ])
+        
+        total_hp = planck_to_hp(sum(amounts_planck))
+        logger.info(f"Batch minted {total_hp} HP to {len(mints)} recipients, batch tx: {batch_hash}")
+        return {
+            "batch_hash": batch_hash,
+            "transaction_hashes": call_hashes,
+            "count": len(call_hashes),
+            "total_amount_hp": total_hp,
+            "total_amount_planck": sum(amounts_planck)
+        }
+    
+    async def batch_transfer_happy_paisa(self, from_user_id: str, transfers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Transfer Happy Paisa from one user to many recipients in one batch extrinsic"""
+        addresses = await self.get_or_create_user_addresses(
+            [from_user_id] + [transfer["to_user_id"] for transfer in transfers]
+        )
+        from_address = addresses[from_user_id]
+        
+        # The chain reserves the batch total against the sender's spendable balance
+        amounts_planck = [hp_to_planck(transfer["amount_hp"]) for transfer in transfers]
+        total_hp = planck_to_hp(sum(amounts_planck))
+        
+        calls = [
+            {
+                "type": TransactionType.TRANSFER,
+                "from": from_address.address,
+                "to": addresses[transfer["to_user_id"]].address,
+                "amount_planck": amount_planck,
+                "metadata": {
+                    "from_user_id": from_user_id,
+                    "to_user_id": transfer["to_user_id"],
+                    "description": transfer.get("description") or "Batch Transfer"
+                }
+            }
+            for transfer, amount_planck in zip(transfers, amounts_planck)
+        ]
+        
+        batch_hash, call_hashes = await self.chain.submit_batch_extrinsic(TransactionType.TRANSFER, calls)
+        
+        records = []
+        for call_hash, transfer, amount_planck in zip(call_hashes, transfers, amounts_planck):
+            records.append(self._build_transaction_record(
+                call_hash, from_user_id, TransactionType.TRANSFER, -amount_planck, batch_hash
+            ))
+            records.append(self._build_transaction_record(
+                call_hash, transfer["to_user_id"], TransactionType.TRANSFER, amount_planck, batch_hash
+            ))
+        await self._store_transaction_records(records)
+        
+        logger.info(f"Batch transferred {total_hp} HP from {from_user_id} to {len(transfers)} recipients, batch tx: {batch_hash}")
+        return {
+            "batch_hash": batch_hash,
+            "transaction_hashes": call_hashes,
+            "count": len(call_hashes),
+            "total_amount_hp": total_hp,
+            "total_amount_planck": sum(amounts_planck)
+        }
+    
     async def get_transaction_status(self, tx_hash: str) -> Dict[str, Any]:
         """Get status of a blockchain transaction"""
         transaction = await self.chain.get_transaction(tx_hash)
@@ -399,22 +910,103 @@ class HappyPaisaBlockchainGateway:
         transactions = await self.chain.get_transactions_by_address(user_address.address, limit)
         
         return [tx.to_dict() for tx in transactions]
-    
-    async def _store_transaction_record(self, tx_hash: str, user_id: str, tx_type: TransactionType, amount_hp: float):
-        """Store transaction record in database for fast querying"""
-        transactions_collection = await get_collection("blockchain_transactions")
+
+    async def get_inclusion_proof(self, tx_hash: str) -> Dict[str, Any]:
+        """Compact proof that a transaction is included in a sealed block"""
+        inclusion = await self.chain.get_inclusion_proof(tx_hash)
+        if inclusion is None:
+            raise ValueError(f"Transaction {tx_hash} not found or not yet included in a block")
         
+        transaction = inclusion["transaction"]
+        block = inclusion["block"]
+        return {
+            "tx_hash": tx_hash,
+            # Exactly the fields hashed into the leaf, so the client can recompute it
+            "leaf_data": {
+                "tx_hash": transaction.hash,
+                "transaction_type": TransactionType(transaction.transaction_type).value,
+                "from_address": transaction.from_address,
+                "to_address": transaction.to_address,
+                "amount_planck": transaction.amount_planck
+            },
+            "leaf": inclusion["leaf"],
+            "leaf_index": inclusion["leaf_index"],
+            "leaf_count": inclusion["leaf_count"],
+            "proof": inclusion["proof"],
+            "block_number": block.number,
+            "block_hash": block.hash,
+            "merkle_root": block.merkle_root,
+            "hash_algorithm": HASH_ALGORITHM,
+            "leaf_encoding": LEAF_ENCODING,
+            "node_encoding": NODE_ENCODING
+        }
+    
+    async def get_latest_blocks(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get latest sealed blocks for the explorer"""
+        blocks = await self.chain.get_latest_blocks(limit)
+        return [block.to_dict() for block in blocks]
+
+    async def search_explorer(self, query: str) -> List[Dict[str, Any]]:
+        """Resolve a block number, block hash, transaction hash or address"""
+        results = []
+
+        if query.isdigit():
+            block = await self.chain.get_block(query)
+            if block:
+                results.append({"type": "block", "data": block.to_dict()})
+
+        elif query.startswith("0x") and len(query) == 66:
+            # Block and transaction hashes share a format, so check both indexes
+            transaction = await self.chain.get_transaction(query)
+            if transaction:
+                results.append({"type": "transaction", "data": transaction.to_dict()})
+            block = await self.chain.get_block(query)
+            if block:
+                results.append({"type": "block", "data": block.to_dict()})
+
+        elif query in self.chain.balances or self.chain.explorer.has_address(query):
+            balance_info = await self.chain.get_balance(query)
+            results.append({
+                "type": "address",
+                "data": {
+                    "address": query,
+                    "balance_hp": balance_info["balance_hp"],
+                    "balance_inr_equiv": balance_info["balance_inr_equiv"],
+                    "recent_transaction_count": len(self.chain.explorer.address_transactions.get(query, ()))
+                }
+            })
+
+        return results
+
+    def _build_transaction_record(self, tx_hash: str, user_id: str, tx_type: TransactionType,
+                                  amount_planck: int, batch_hash: str = None) -> Dict[str, Any]:
+        """Build a blockchain_transactions record; amount_planck (signed, Decimal128) is the exact value"""
         record = {
             "tx_hash": tx_hash,
             "user_id": user_id,
             "transaction_type": tx_type,
-            "amount_hp": amount_hp,
-            "amount_inr_equiv": abs(amount_hp) * 1000,
+            "amount_planck": to_decimal128(amount_planck),
+            # Display copies derived once from the exact amount
+            "amount_hp": planck_to_hp(amount_planck),
+            "amount_inr_equiv": planck_to_inr(abs(amount_planck)),
             "created_at": datetime.utcnow(),
             "status": TransactionStatus.PENDING
         }
-        
-        await transactions_collection.insert_one(record)
+        if batch_hash:
+            record["batch_hash"] = batch_hash
+        return record
+    
+    async def _store_transaction_record(self, tx_hash: str, user_id: str, tx_type: TransactionType, amount_planck: int):
+        """Store transaction record in database for fast querying"""
+        transactions_collection = await get_collection("blockchain_transactions")
+        await transactions_collection.insert_one(self._build_transaction_record(tx_hash, user_id, tx_type, amount_planck))
+    
+    async def _store_transaction_records(self, records: List[Dict[str, Any]]):
+        """Store many transaction records with a single bulk insert"""
+        if not records:
+            return
+        transactions_collection = await get_collection("blockchain_transactions")
+        await transactions_collection.insert_many(records, ordered=False)
     
     async def sync_transaction_status(self, tx_hash: str):
         """Sync transaction status from blockchain to database"""
@@ -422,9 +1014,12 @@ class HappyPaisaBlockchainGateway:
         if not chain_tx:
             return
         
+        # Batch records are stored per inner call, keyed by their batch hash
+        record_filter = {"batch_hash": tx_hash} if chain_tx.transaction_type == TransactionType.BATCH else {"tx_hash": tx_hash}
+        
         transactions_collection = await get_collection("blockchain_transactions")
         await transactions_collection.update_many(
-            {"tx_hash": tx_hash},
+            record_filter,
             {
                 "$set": {
                     "status": chain_tx.status,
@@ -441,7 +1036,7 @@ class HappyPaisaBlockchainGateway:
         
         # Count transactions
         total_transactions = len(self.chain.transactions)
-        pending_transactions = len(self.chain.pending_transactions)
+        pending_transactions = len(self.chain.mempool)
         
         # Calculate total addresses
         total_addresses = len(self.chain.balances)
@@ -451,13 +1046,19 @@ class HappyPaisaBlockchainGateway:
             "network": "happy-paisa-mainnet",
             "latest_block": chain_info["currentBlock"],
             "total_supply_hp": chain_info["totalSupply"],
+            "total_supply_planck": chain_info["totalSupplyPlanck"],
             "total_transactions": total_transactions,
             "pending_transactions": pending_transactions,
             "total_addresses": total_addresses,
             "active_addresses": active_addresses,
             "average_block_time": chain_info["blockTime"],
             "decimals": chain_info["decimals"],
-            "symbol": chain_info["symbol"]
+            "symbol": chain_info["symbol"],
+            "explorer": self.chain.explorer.get_stats(),
+            "retention": self.chain.get_retention_stats(),
+            "mempool": self.chain.mempool.get_stats(),
+            "address_registry": self.addresses.get_stats(),
+            "subscriptions": self.chain.events.get_stats()
         }
 
 # Global instance
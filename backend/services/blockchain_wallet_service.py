@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Any
 from ..models.wallet import WalletTransaction, WalletBalance
 from ..services.database import get_collection
 from ..services.blockchain_gateway_service import blockchain_gateway, TransactionType, TransactionStatus
+from ..services.currency_units import planck_to_hp, planck_to_inr, record_planck, to_decimal128
 
 logger = logging.getLogger(__name__)
 
@@ -33,19 +34,19 @@ class BlockchainWalletService:
             for tx in recent_transactions:
                 if tx.get("type") == "debit":
                     category = tx.get("category", "Other")
-                    if category in spending_breakdown:
-                        spending_breakdown[category] += abs(tx.get("amount_hp", 0))
-                    else:
-                        spending_breakdown["Other"] += abs(tx.get("amount_hp", 0))
+                    if category not in spending_breakdown:
+                        category = "Other"
+                    spending_breakdown[category] += abs(record_planck(tx))
             
             wallet_balance = WalletBalance(
                 user_id=user_id,
                 balance_hp=blockchain_balance["balance_hp"],
                 balance_inr_equiv=blockchain_balance["balance_inr_equiv"],
+                balance_planck=blockchain_balance["balance_planck"],
                 blockchain_address=blockchain_balance["address"],
                 network="happy-paisa-mainnet",
                 last_updated=datetime.utcnow(),
-                spending_breakdown=spending_breakdown,
+                spending_breakdown={category: planck_to_hp(amount) for category, amount in spending_breakdown.items()},
                 recent_transactions=recent_transactions
             )
             
@@ -251,15 +252,16 @@ class BlockchainWalletService:
             recent_transactions = await BlockchainWalletService.get_recent_transactions(user_id, 100)
             
             # Calculate analytics
-            total_spent = sum(tx.get("amount_hp", 0) for tx in recent_transactions if tx.get("type") == "debit")
-            total_received = sum(tx.get("amount_hp", 0) for tx in recent_transactions if tx.get("type") == "credit")
+            # Sum exact planck amounts and convert once for display
+            total_spent = sum(record_planck(tx) for tx in recent_transactions if tx.get("type") == "debit")
+            total_received = sum(record_planck(tx) for tx in recent_transactions if tx.get("type") == "credit")
             
             # Category breakdown
             category_spending = {}
             for tx in recent_transactions:
                 if tx.get("type") == "debit":
                     category = tx.get("category", "Other")
-                    category_spending[category] = category_spending.get(category, 0) + tx.get("amount_hp", 0)
+                    category_spending[category] = category_spending.get(category, 0) + record_planck(tx)
             
             # Get blockchain network stats
             network_stats = await blockchain_gateway.get_network_stats()
@@ -268,10 +270,10 @@ class BlockchainWalletService:
                 "user_analytics": {
                     "current_balance_hp": balance.balance_hp,
                     "current_balance_inr": balance.balance_inr_equiv,
-                    "total_spent_hp": total_spent,
-                    "total_received_hp": total_received,
+                    "total_spent_hp": planck_to_hp(total_spent),
+                    "total_received_hp": planck_to_hp(total_received),
                     "transaction_count": len(recent_transactions),
-                    "category_spending": category_spending,
+                    "category_spending": {category: planck_to_hp(amount) for category, amount in category_spending.items()},
                     "blockchain_address": balance.blockchain_address
                 },
                 "network_info": {
@@ -303,8 +305,7 @@ class BlockchainWalletService:
                 {
                     "$set": {
                         "user_id": user_id,
-                        "balance_hp": balance.balance_hp,
-                        "balance_inr_equiv": balance.balance_inr_equiv,
+                        "balance_planck": to_decimal128(balance.balance_planck),
                         "blockchain_address": balance.blockchain_address,
                         "network": balance.network,
                         "last_updated": balance.last_updated,
@@ -324,10 +325,15 @@ class BlockchainWalletService:
             cached_balance = await cache_collection.find_one({"user_id": user_id})
             
             if cached_balance:
+                balance_planck = record_planck({
+                    "amount_planck": cached_balance.get("balance_planck"),
+                    "amount_hp": cached_balance.get("balance_hp", 0)
+                })
                 return WalletBalance(
                     user_id=user_id,
-                    balance_hp=cached_balance.get("balance_hp", 0),
-                    balance_inr_equiv=cached_balance.get("balance_inr_equiv", 0),
+                    balance_hp=planck_to_hp(balance_planck),
+                    balance_inr_equiv=planck_to_inr(balance_planck),
+                    balance_planck=balance_planck,
                     blockchain_address=cached_balance.get("blockchain_address", ""),
                     network=cached_balance.get("network", "happy-paisa-mainnet"),
                     last_updated=cached_balance.get("last_updated", datetime.utcnow()),
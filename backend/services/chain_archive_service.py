@@ -0,0 +1,187 @@
+"""
+Happy Paisa Chain Archive Service
+Persistent store for blocks and transactions that have aged out of the chain's in-memory retention window
+"""
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+import logging
+
+from bson.errors import InvalidDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+from ..services.database import get_collection
+from ..services.block_explorer_service import ChainBlock
+
+logger = logging.getLogger(__name__)
+
+# Records per insert_many, so one rejected record only sends its own chunk down the slow path
+FLUSH_CHUNK_SIZE = 500
+# Rejected records kept for inspection (oldest dropped first)
+MAX_DEAD_LETTERS = 1000
+
+class ChainArchive:
+    """
+    Spills evicted blocks/transactions to MongoDB and serves old lookups on demand.
+    Evicted records are buffered until the background flush has written them,
+    so lookups never miss a record that is in flight. Records MongoDB rejects
+    move to a dead-letter list instead of blocking every later flush.
+    """
+
+    def __init__(self, persist: bool = True):
+        self.persist = persist
+        self.pending_transactions: Dict[str, Dict[str, Any]] = {}  # tx_hash -> record awaiting flush
+        self.pending_blocks: Dict[int, Dict[str, Any]] = {}  # block number -> record awaiting flush
+        self.archived_transactions = 0
+        self.archived_blocks = 0
+        self.flush_failures = 0
+        self.dead_letters: deque = deque(maxlen=MAX_DEAD_LETTERS)
+        self.dead_lettered = 0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        transactions_collection = await get_collection("chain_transaction_archive")
+        await transactions_collection.create_index([("from_address", 1), ("block_number", -1)])
+        await transactions_collection.create_index([("to_address", 1), ("block_number", -1)])
+        await transactions_collection.create_index("block_number")
+        blocks_collection = await get_collection("chain_block_archive")
+        await blocks_collection.create_index("block_hash", unique=True)
+
+    def add(self, block: Optional[ChainBlock], transactions: List[Dict[str, Any]]):
+        """Queue an evicted block and its transaction records for persistence"""
+        self.archived_transactions += len(transactions)
+        if block is not None:
+            self.archived_blocks += 1
+        if not self.persist:
+            return
+
+        for record in transactions:
+            self.pending_transactions[record["_id"]] = record
+        if block is not None:
+            block_record = block.to_dict()
+            block_record["_id"] = block.number
+            block_record["timestamp"] = block.timestamp
+            self.pending_blocks[block.number] = block_record
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Write buffered records to MongoDB"""
+        while self.pending_transactions or self.pending_blocks:
+            transactions = list(self.pending_transactions.values())
+            blocks = list(self.pending_blocks.values())
+            try:
+                if transactions:
+                    await self._insert_chunked("chain_transaction_archive", transactions)
+                if blocks:
+                    await self._insert_chunked("chain_block_archive", blocks)
+            except Exception as e:
+                # Records stay buffered and are retried on the next eviction
+                self.flush_failures += 1
+                logger.error(f"Failed to flush chain archive: {e}")
+                return
+
+            for record in transactions:
+                self.pending_transactions.pop(record["_id"], None)
+            for record in blocks:
+                self.pending_blocks.pop(record["_id"], None)
+
+    async def _insert_chunked(self, collection_name: str, records: List[Dict[str, Any]]):
+        """
+        Insert records in chunks, ignoring ones an earlier partial flush already wrote.
+        Records MongoDB rejects are dead-lettered; connection errors propagate so the
+        whole buffer is retried.
+        """
+        collection = await get_collection(collection_name)
+        for start in range(0, len(records), FLUSH_CHUNK_SIZE):
+            chunk = records[start:start + FLUSH_CHUNK_SIZE]
+            try:
+                await collection.insert_many(chunk, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") != 11000:
+                        self._dead_letter(collection_name, chunk[error["index"]], error.get("errmsg"))
+            except (InvalidDocument, OverflowError):
+                # A record that cannot be encoded fails its whole chunk; insert one by one to isolate it
+                for record in chunk:
+                    try:
+                        await collection.insert_one(record)
+                    except DuplicateKeyError:
+                        pass
+                    except (InvalidDocument, OverflowError, WriteError) as e:
+                        self._dead_letter(collection_name, record, str(e))
+
+    def _dead_letter(self, collection_name: str, record: Dict[str, Any], error: Optional[str]):
+        self.dead_lettered += 1
+        self.dead_letters.append({
+            "collection": collection_name,
+            "record": record,
+            "error": error,
+            "failed_at": datetime.utcnow()
+        })
+        logger.error(f"Dead-lettered {collection_name} record {record.get('_id')}: {error}")
+
+    async def get_transaction(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        if tx_hash in self.pending_transactions:
+            return self.pending_transactions[tx_hash]
+        if not self.persist:
+            return None
+        collection = await get_collection("chain_transaction_archive")
+        return await collection.find_one({"_id": tx_hash})
+
+    async def get_block(self, number: int = None, block_hash: str = None) -> Optional[Dict[str, Any]]:
+        if number is not None and number in self.pending_blocks:
+            return self.pending_blocks[number]
+        if block_hash is not None:
+            for record in self.pending_blocks.values():
+                if record["block_hash"] == block_hash:
+                    return record
+        if not self.persist:
+            return None
+        collection = await get_collection("chain_block_archive")
+        query = {"_id": number} if number is not None else {"block_hash": block_hash}
+        return await collection.find_one(query)
+
+    async def get_block_transactions(self, block_number: int) -> List[Dict[str, Any]]:
+        """All archived transactions included in a block, in no particular order"""
+        records = {
+            tx_hash: record for tx_hash, record in self.pending_transactions.items()
+            if record["block_number"] == block_number
+        }
+        if self.persist:
+            collection = await get_collection("chain_transaction_archive")
+            async for record in collection.find({"block_number": block_number}):
+                records.setdefault(record["_id"], record)
+        return list(records.values())
+
+    async def get_transactions_by_address(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Archived transactions touching an address, newest first"""
+        records = [
+            record for record in self.pending_transactions.values()
+            if record["from_address"] == address or record["to_address"] == address
+        ]
+        if self.persist and len(records) < limit:
+            collection = await get_collection("chain_transaction_archive")
+            seen = {record["_id"] for record in records}
+            cursor = collection.find(
+                {"$or": [{"from_address": address}, {"to_address": address}]}
+            ).sort("block_number", -1).limit(limit)
+            async for record in cursor:
+                if record["_id"] not in seen:
+                    records.append(record)
+
+        records.sort(key=lambda record: record["block_number"] or 0, reverse=True)
+        return records[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "persist": self.persist,
+            "archived_blocks": self.archived_blocks,
+            "archived_transactions": self.archived_transactions,
+            "pending_transaction_writes": len(self.pending_transactions),
+            "pending_block_writes": len(self.pending_blocks),
+            "flush_failures": self.flush_failures,
+            "dead_lettered": self.dead_lettered
+        }
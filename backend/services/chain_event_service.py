@@ -0,0 +1,139 @@
+"""
+Happy Paisa Chain Event Service
+In-process pub/sub that the block producer publishes to, fanned out to SSE subscribers
+"""
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+BLOCKS_TOPIC = "blocks"
+
+def tx_topic(tx_hash: str) -> str:
+    return f"tx:{tx_hash}"
+
+def address_topic(address: str) -> str:
+    return f"address:{address}"
+
+@dataclass
+class ChainEvent:
+    """A single chain event delivered to subscribers"""
+    event: str  # new_block, tx_status, balance
+    topic: str
+    data: Dict[str, Any]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+class ChainSubscription:
+    """
+    A subscriber's bounded event queue.
+    When the queue is full the oldest event is dropped, so a slow client never
+    blocks the block producer; clients that fall too far behind are closed.
+    """
+
+    def __init__(self, topics: Set[str], queue_size: int, max_dropped: int):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.max_dropped = max_dropped
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event: ChainEvent) -> bool:
+        """Enqueue without blocking; returns False once the subscriber is too slow"""
+        if self.closed:
+            return False
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return True
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+                if self.dropped > self.max_dropped:
+                    self.closed = True
+                    return False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[ChainEvent]:
+        """Wait for the next event; None on timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    @property
+    def exhausted(self) -> bool:
+        """Closed and fully drained"""
+        return self.closed and self.queue.empty()
+
+class ChainEventBus:
+    """
+    Topic-indexed pub/sub for chain events.
+    Publishing only touches subscribers of the affected topics, so idle
+    subscribers waiting on other transactions cost nothing per block.
+    """
+
+    def __init__(self, max_subscribers: int = 10000, queue_size: int = 64, max_dropped: int = 256):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.subscribers: Dict[str, Set[ChainSubscription]] = {}
+        self.subscriber_count = 0
+        self.published_events = 0
+        self.delivered_events = 0
+        self.evicted_subscribers = 0
+
+    def subscribe(self, topics: Iterable[str]) -> ChainSubscription:
+        """Register a subscriber for the given topics"""
+        if self.subscriber_count >= self.max_subscribers:
+            raise RuntimeError("Too many chain event subscribers")
+
+        subscription = ChainSubscription(set(topics), self.queue_size, self.max_dropped)
+        for topic in subscription.topics:
+            self.subscribers.setdefault(topic, set()).add(subscription)
+        self.subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: ChainSubscription):
+        """Remove a subscriber from every topic it listens on"""
+        removed = False
+        for topic in subscription.topics:
+            topic_subscribers = self.subscribers.get(topic)
+            if topic_subscribers and subscription in topic_subscribers:
+                topic_subscribers.discard(subscription)
+                removed = True
+                if not topic_subscribers:
+                    del self.subscribers[topic]
+        if removed:
+            self.subscriber_count -= 1
+        subscription.closed = True
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self.subscribers
+
+    def publish(self, topic: str, event: str, data: Dict[str, Any]):
+        """Deliver an event to every subscriber of a topic without awaiting"""
+        topic_subscribers = self.subscribers.get(topic)
+        if not topic_subscribers:
+            return
+
+        chain_event = ChainEvent(event=event, topic=topic, data=data)
+        self.published_events += 1
+        for subscription in list(topic_subscribers):
+            if subscription.offer(chain_event):
+                self.delivered_events += 1
+            else:
+                logger.warning(f"Dropping slow chain event subscriber on {topic}")
+                self.evicted_subscribers += 1
+                self.unsubscribe(subscription)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscriber_count,
+            "max_subscribers": self.max_subscribers,
+            "topics": len(self.subscribers),
+            "published_events": self.published_events,
+            "delivered_events": self.delivered_events,
+            "evicted_subscribers": self.evicted_subscribers
+        }
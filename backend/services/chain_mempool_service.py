@@ -0,0 +1,172 @@
+"""
+Happy Paisa Chain Mempool Service
+Fee-prioritized transaction pool with reserved lanes, per-sender nonce ordering and block capacity
+"""
+import heapq
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, List, Tuple, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MempoolLane(str, Enum):
+    CARD_SETTLEMENT = "card_settlement"
+    USER_TRANSFER = "user_transfer"
+    GENERAL = "general"  # mints, burns and batches, ordered purely by fee
+
+class MempoolEntry:
+    """A pending extrinsic as seen by the scheduler"""
+    __slots__ = ("tx_hash", "sender", "nonce", "lane", "fee_planck", "weight", "seq", "submitted_at")
+
+    def __init__(self, tx_hash: str, sender: str, nonce: int, lane: MempoolLane,
+                 fee_planck: int, weight: int, seq: int):
+        self.tx_hash = tx_hash
+        self.sender = sender
+        self.nonce = nonce
+        self.lane = lane
+        self.fee_planck = fee_planck
+        self.weight = weight
+        self.seq = seq
+        self.submitted_at = time.monotonic()
+
+class LaneStats:
+    """Queue depth and wait-time counters for one lane"""
+
+    def __init__(self, sample_size: int):
+        self.depth = 0
+        self.submitted = 0
+        self.included = 0
+        self.max_wait = 0.0
+        self.waits: Deque[float] = deque(maxlen=sample_size)  # recent submit-to-block waits, seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))], 6) if waits else 0.0
+        return {
+            "depth": self.depth,
+            "submitted": self.submitted,
+            "included": self.included,
+            "wait_seconds": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": round(self.max_wait, 6)}
+        }
+
+class ChainMempool:
+    """
+    Only the lowest-nonce pending extrinsic of each sender is ready; it sits in its
+    lane's heap ordered by (fee desc, arrival). Each block first fills the reserved
+    share of the card settlement and user transfer lanes, then the remaining capacity
+    from the highest-fee ready extrinsics of any lane.
+    """
+
+    def __init__(self, block_capacity: int = 2000, reserved_shares: Dict[MempoolLane, float] = None,
+                 wait_sample_size: int = 1000):
+        self.block_capacity = block_capacity
+        self.reserved_shares = reserved_shares if reserved_shares is not None else {
+            MempoolLane.CARD_SETTLEMENT: 0.2,
+            MempoolLane.USER_TRANSFER: 0.2
+        }
+        self._ready: Dict[MempoolLane, List[Tuple[int, int, MempoolEntry]]] = {lane: [] for lane in MempoolLane}
+        self._senders: Dict[str, Deque[MempoolEntry]] = {}  # sender -> pending entries in nonce order
+        self._seq = 0
+        self._size = 0
+        self.blocks_filled = 0
+        self.lane_stats = {lane: LaneStats(wait_sample_size) for lane in MempoolLane}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def max_weight(self) -> int:
+        """Heaviest extrinsic that fits a block: whatever the unreserved part of a block holds"""
+        reserved = sum(int(self.block_capacity * share) for share in self.reserved_shares.values())
+        return max(self.block_capacity - reserved, 1)
+
+    def add(self, tx_hash: str, sender: str, nonce: int, lane: MempoolLane,
+            fee_planck: int, weight: int = 1):
+        """Queue an extrinsic; nonces must be added in increasing order per sender"""
+        weight = max(weight, 1)
+        if weight > self.max_weight:
+            raise ValueError(f"Extrinsic weight {weight} exceeds the block limit of {self.max_weight}")
+        self._seq += 1
+        entry = MempoolEntry(tx_hash, sender, nonce, MempoolLane(lane), fee_planck, weight, self._seq)
+        queue = self._senders.setdefault(sender, deque())
+        queue.append(entry)
+        if len(queue) == 1:
+            self._push_ready(entry)
+
+        self._size += 1
+        stats = self.lane_stats[entry.lane]
+        stats.depth += 1
+        stats.submitted += 1
+
+    def _push_ready(self, entry: MempoolEntry):
+        heapq.heappush(self._ready[entry.lane], (-entry.fee_planck, entry.seq, entry))
+
+    def _take(self, lane: MempoolLane, now: float) -> MempoolEntry:
+        """Pop a lane's best ready entry and promote the sender's next nonce"""
+        _, _, entry = heapq.heappop(self._ready[lane])
+        queue = self._senders[entry.sender]
+        queue.popleft()
+        if queue:
+            self._push_ready(queue[0])
+        else:
+            del self._senders[entry.sender]
+
+        self._size -= 1
+        stats = self.lane_stats[lane]
+        stats.depth -= 1
+        stats.included += 1
+        wait = now - entry.submitted_at
+        stats.waits.append(wait)
+        stats.max_wait = max(stats.max_wait, wait)
+        return entry
+
+    def select_block(self) -> List[str]:
+        """Remove and return the tx hashes for the next block, in inclusion order"""
+        now = time.monotonic()
+        selected = []
+        used = 0
+
+        # Reserved lanes get their share first, regardless of fees elsewhere
+        for lane, share in self.reserved_shares.items():
+            budget = int(self.block_capacity * share)
+            lane_used = 0
+            heap = self._ready[lane]
+            while heap and lane_used + heap[0][2].weight <= budget:
+                entry = self._take(lane, now)
+                lane_used += entry.weight
+                selected.append(entry.tx_hash)
+            used += lane_used
+
+        # Remaining capacity goes to the highest fee across all lanes
+        blocked = set()
+        while used < self.block_capacity:
+            candidates = [
+                (heap[0][0], heap[0][1], lane) for lane, heap in self._ready.items()
+                if heap and lane not in blocked
+            ]
+            if not candidates:
+                break
+            _, _, lane = min(candidates)
+            if used + self._ready[lane][0][2].weight > self.block_capacity:
+                blocked.add(lane)
+                continue
+            entry = self._take(lane, now)
+            used += entry.weight
+            selected.append(entry.tx_hash)
+
+        if selected:
+            self.blocks_filled += 1
+        return selected
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._size,
+            "senders": len(self._senders),
+            "block_capacity": self.block_capacity,
+            "reserved_shares": {lane.value: share for lane, share in self.reserved_shares.items()},
+            "blocks_filled": self.blocks_filled,
+            "lanes": {lane.value: stats.to_dict() for lane, stats in self.lane_stats.items()}
+        }
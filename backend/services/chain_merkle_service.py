@@ -0,0 +1,65 @@
+"""
+Happy Paisa Chain Merkle Service
+Merkle roots over block extrinsics and compact inclusion proofs for light clients
+"""
+import hashlib
+from typing import Dict, List, Any
+
+HASH_ALGORITHM = "blake2b-256"
+LEAF_ENCODING = "0x00 || utf8(tx_hash|transaction_type|from_address|to_address|amount_planck)"
+NODE_ENCODING = "0x01 || left || right"
+
+# Domain separation keeps a leaf from ever being reinterpreted as an inner node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+EMPTY_ROOT = "0x" + hashlib.blake2b(b"", digest_size=32).hexdigest()
+
+def _hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=32).digest()
+
+def leaf_hash(tx_hash: str, transaction_type: str, from_address: str, to_address: str, amount_planck: int) -> bytes:
+    """Leaf committing to the fields a verifier cares about, not just the tx hash"""
+    payload = f"{tx_hash}|{transaction_type}|{from_address}|{to_address}|{amount_planck}"
+    return _hash(_LEAF_PREFIX + payload.encode())
+
+def _parent(left: bytes, right: bytes) -> bytes:
+    return _hash(_NODE_PREFIX + left + right)
+
+def _next_level(level: List[bytes]) -> List[bytes]:
+    # An odd last node is promoted unchanged rather than paired with itself
+    parents = [_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+def merkle_root(leaves: List[bytes]) -> str:
+    if not leaves:
+        return EMPTY_ROOT
+    level = leaves
+    while len(level) > 1:
+        level = _next_level(level)
+    return "0x" + level[0].hex()
+
+def merkle_proof(leaves: List[bytes], index: int) -> List[Dict[str, str]]:
+    """Sibling path from leaf to root; log2(n) entries"""
+    if not 0 <= index < len(leaves):
+        raise ValueError("Leaf index out of range")
+    proof = []
+    level = leaves
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                "position": "left" if sibling < index else "right",
+                "hash": "0x" + level[sibling].hex()
+            })
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+def verify_proof(leaf: bytes, proof: List[Dict[str, Any]], root: str) -> bool:
+    node = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"][2:])
+        node = _parent(sibling, node) if step["position"] == "left" else _parent(node, sibling)
+    return "0x" + node.hex() == root
@@ -0,0 +1,64 @@
+"""
+Happy Paisa Currency Units
+Fixed-point conversions between planck (ledger unit) and display amounts in HP / INR
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Annotated, Any, Union
+
+from bson.decimal128 import Decimal128
+from pydantic import BeforeValidator
+
+HP_DECIMALS = 12
+PLANCK_PER_HP = 10 ** HP_DECIMALS  # 1 HP = 10^12 planck
+INR_PER_HP = 1000  # 1 HP = 1000 INR
+
+Amount = Union[int, float, str, Decimal]
+
+def hp_to_planck(amount_hp: Amount) -> int:
+    """
+    Convert an HP amount from the API edge to integer planck.
+    Floats go through their shortest repr, so 0.299 HP is exactly
+    299_000_000_000 planck rather than int(0.299 * 10**12) = 298_999_999_999.
+    """
+    if isinstance(amount_hp, float):
+        amount_hp = repr(amount_hp)
+    planck = Decimal(amount_hp) * PLANCK_PER_HP
+    return int(planck.quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+def inr_to_planck(amount_inr: Amount) -> int:
+    if isinstance(amount_inr, float):
+        amount_inr = repr(amount_inr)
+    planck = Decimal(amount_inr) * PLANCK_PER_HP / INR_PER_HP
+    return int(planck.quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+def planck_to_hp(planck: int) -> float:
+    """Display amount in HP; only call this when building a response"""
+    return float(Decimal(planck) / PLANCK_PER_HP)
+
+def planck_to_inr(planck: int) -> float:
+    """Display amount in INR; only call this when building a response"""
+    return float(Decimal(planck) * INR_PER_HP / PLANCK_PER_HP)
+
+def record_planck(record: dict) -> int:
+    """Exact amount of a stored record, falling back to its float amount_hp for legacy rows"""
+    amount_planck = record.get("amount_planck")
+    if amount_planck is not None:
+        return stored_planck(amount_planck)
+    return hp_to_planck(record.get("amount_hp", 0))
+
+def to_decimal128(planck: int) -> Decimal128:
+    """
+    Planck for MongoDB. At 10^12 planck per HP an int64 tops out around 9.2M HP,
+    below realistic balances and batch totals; Decimal128 holds 34 exact digits.
+    """
+    return Decimal128(Decimal(int(planck)))
+
+def _decimal128_to_int(value: Any) -> Any:
+    return int(value.to_decimal()) if isinstance(value, Decimal128) else value
+
+def stored_planck(value: Any) -> int:
+    """Exact planck from a stored value (Decimal128, or int/Int64 in rows written before Decimal128)"""
+    return int(_decimal128_to_int(value))
+
+# Model field type for planck amounts read back from MongoDB
+Planck = Annotated[int, BeforeValidator(_decimal128_to_int)]
@@ -0,0 +1,137 @@
+"""
+HTTP Client Registry
+Shared pooled async HTTP clients, one per upstream, opened on startup and closed on shutdown
+"""
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); without it clients speak HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+@dataclass
+class UpstreamConfig:
+    base_url: str = ""
+    headers: Dict[str, str] = field(default_factory=dict)
+    timeout: httpx.Timeout = field(default_factory=lambda: httpx.Timeout(30.0, connect=5.0))
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+class UpstreamCounters:
+    def __init__(self):
+        self.requests = 0
+        self.responses: Dict[str, int] = {}  # by status class, e.g. "2xx"
+        self.clients_opened = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "responses": dict(self.responses), "clients_opened": self.clients_opened}
+
+class HTTPClientRegistry:
+    """
+    Services register their upstream once at import time and fetch the client with
+    get() on every call, so all requests to a host share one keep-alive pool with
+    its own connection limits. start() opens every registered client and close()
+    shuts them down; a get() outside that lifecycle (scripts, tests) opens the
+    client on demand.
+    """
+
+    def __init__(self):
+        self.configs: Dict[str, UpstreamConfig] = {}
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.counters: Dict[str, UpstreamCounters] = {}
+
+    def register(self, name: str, base_url: str = "", headers: Optional[Dict[str, str]] = None,
+                 timeout: Optional[httpx.Timeout] = None, max_connections: int = 20,
+                 max_keepalive: int = 10, keepalive_expiry: float = 30.0, http2: bool = True):
+        config = UpstreamConfig(base_url=base_url, headers=headers or {}, max_connections=max_connections,
+                                max_keepalive=min(max_keepalive, max_connections),
+                                keepalive_expiry=keepalive_expiry, http2=http2)
+        if timeout is not None:
+            config.timeout = timeout
+        self.configs[name] = config
+        self.counters.setdefault(name, UpstreamCounters())
+
+    def _open(self, name: str) -> httpx.AsyncClient:
+        config = self.configs[name]
+        counters = self.counters[name]
+
+        async def on_request(request: httpx.Request):
+            counters.requests += 1
+
+        async def on_response(response: httpx.Response):
+            status_class = f"{response.status_code // 100}xx"
+            counters.responses[status_class] = counters.responses.get(status_class, 0) + 1
+
+        client = httpx.AsyncClient(
+            base_url=config.base_url,
+            headers=config.headers,
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive,
+                keepalive_expiry=config.keepalive_expiry
+            ),
+            http2=config.http2 and HTTP2_AVAILABLE,
+            event_hooks={"request": [on_request], "response": [on_response]}
+        )
+        counters.clients_opened += 1
+        self.clients[name] = client
+        return client
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self.clients.get(name)
+        if client is None or client.is_closed:
+            if name not in self.configs:
+                raise KeyError(f"No HTTP client registered for upstream: {name}")
+            client = self._open(name)
+        return client
+
+    async def start(self):
+        for name in self.configs:
+            self.get(name)
+        logger.info(f"Opened pooled HTTP clients: {', '.join(self.configs)} (HTTP/2 {'on' if HTTP2_AVAILABLE else 'unavailable'})")
+
+    async def close(self):
+        clients, self.clients = self.clients, {}
+        for name, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Failed to close HTTP client for {name}: {e}")
+
+    def _pool_stats(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        # httpx exposes no public pool metrics; read the httpcore pool if it is there
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "connections": len(connections),
+            "idle": sum(1 for connection in connections if connection.is_idle()),
+            "http2": sum(1 for connection in connections if "HTTP/2" in repr(connection))
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        upstreams = {}
+        for name, config in self.configs.items():
+            client = self.clients.get(name)
+            stats = {
+                "base_url": config.base_url,
+                "max_connections": config.max_connections,
+                "max_keepalive": config.max_keepalive,
+                "http2": config.http2 and HTTP2_AVAILABLE,
+                "open": client is not None and not client.is_closed,
+                **self.counters[name].to_dict()
+            }
+            if stats["open"]:
+                stats["pool"] = self._pool_stats(client)
+            upstreams[name] = stats
+        return {"http2_available": HTTP2_AVAILABLE, "upstreams": upstreams}
+
+# Global instance
+http_clients = HTTPClientRegistry()
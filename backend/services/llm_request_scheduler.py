@@ -0,0 +1,193 @@
+"""
+LLM Request Scheduler
+Client-side admission control for the Friendli API: in-flight cap, token buckets, priority lanes and retry
+"""
+import asyncio
+import heapq
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Any
+import logging
+
+import httpx
+
+from ..services.prompt_builder import count_tokens
+from ..services.rate_limit import TokenBucket
+from ..services.request_hedger import Admission
+
+logger = logging.getLogger(__name__)
+
+class RequestPriority(IntEnum):
+    INTERACTIVE = 0  # chat, voice, health probes - a user is waiting
+    STANDARD = 1     # dashboard insights and single transaction analysis
+    BACKGROUND = 2   # fraud scans and batch jobs
+
+class FriendliAPIError(Exception):
+    """Non-2xx response from the Friendli API"""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"Friendli AI API error: {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, FriendliAPIError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Prompt size by the local token estimate (plus per-message overhead) and the completion budget"""
+    return prompt_tokens(messages) + max_tokens
+
+def prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(count_tokens(message.get("content", "")) + 4 for message in messages)
+
+class LaneCounters:
+    def __init__(self):
+        self.queued = 0
+        self.granted = 0
+        self.max_queue_wait = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"queued": self.queued, "granted": self.granted, "max_queue_wait_seconds": round(self.max_queue_wait, 6)}
+
+class LLMRequestScheduler:
+    """
+    Waiters queue in a heap ordered by (priority, arrival). A request is admitted when
+    an in-flight slot is free and both the request and token buckets can cover it;
+    the head of the queue is always served first, so a queued interactive request
+    goes ahead of any background scan that arrived earlier. Retryable failures
+    (429, 5xx, transport errors) release their slot, back off with full jitter
+    (honouring Retry-After) and queue again at the same priority.
+    """
+
+    def __init__(self, max_in_flight: int = 8, requests_per_minute: float = 600,
+                 tokens_per_minute: float = 200000, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 20.0):
+        self.max_in_flight = max_in_flight
+        self.request_bucket = TokenBucket(requests_per_minute / 60, max(requests_per_minute / 60, 1))
+        # Burst of up to ~10 seconds of token budget
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 6)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []  # (priority, seq, tokens, future)
+        self._seq = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.lanes = {priority: LaneCounters() for priority in RequestPriority}
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def _dispatch(self):
+        while self._waiters and self.in_flight < self.max_in_flight:
+            priority, _, tokens, future = self._waiters[0]
+            if future.done():  # caller gave up while queued
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self.request_bucket.wait_time(1), self.token_bucket.wait_time(tokens))
+            if wait > 0:
+                self._schedule_wakeup(wait)
+                return
+            heapq.heappop(self._waiters)
+            self.request_bucket.take(1)
+            self.token_bucket.take(tokens)
+            self.in_flight += 1
+            self.lanes[RequestPriority(priority)].queued -= 1
+            future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float):
+        if self._wakeup is None:
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    async def _acquire(self, priority: RequestPriority, tokens: int):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._seq += 1
+        heapq.heappush(self._waiters, (int(priority), self._seq, tokens, future))
+        lane = self.lanes[priority]
+        lane.queued += 1
+        queued_at = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # admitted in the same tick the caller was cancelled
+            else:
+                lane.queued -= 1
+            raise
+        lane.granted += 1
+        lane.max_queue_wait = max(lane.max_queue_wait, time.monotonic() - queued_at)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def queue_depth(self) -> int:
+        return sum(lane.queued for lane in self.lanes.values())
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriority = RequestPriority.STANDARD, tokens: int = 0,
+                   admission: Optional[Admission] = None):
+        """Hold an admitted slot for the duration of the block (used for streams)"""
+        if admission is not None:
+            admission.queued()
+        await self._acquire(priority, tokens)
+        if admission is not None:
+            admission.admitted()
+        try:
+            yield
+        finally:
+            if admission is not None:
+                admission.released()
+            self._release()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def submit(self, call: Callable[[], Awaitable[Any]],
+                     priority: RequestPriority = RequestPriority.STANDARD, tokens: int = 0,
+                     admission: Optional[Admission] = None) -> Any:
+        """Run call once admitted, retrying retryable failures with jittered exponential backoff"""
+        attempt = 0
+        while True:
+            async with self.slot(priority, tokens, admission):
+                try:
+                    return await call()
+                except Exception as e:
+                    if not is_retryable(e) or attempt >= self.max_retries:
+                        if is_retryable(e):
+                            self.failures += 1
+                        raise
+                    error = e
+            if getattr(error, "status_code", None) == 429:
+                self.throttled += 1
+            delay = self._backoff(attempt, error)
+            attempt += 1
+            self.retries += 1
+            logger.warning(f"Friendli AI request failed ({error}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queue_depth(),
+            "request_tokens_available": round(self.request_bucket.tokens, 2),
+            "llm_tokens_available": round(self.token_bucket.tokens, 2),
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "retry_exhausted": self.failures,
+            "lanes": {priority.name.lower(): lane.to_dict() for priority, lane in self.lanes.items()}
+        }
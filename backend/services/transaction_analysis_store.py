@@ -0,0 +1,118 @@
+"""
+Transaction Analysis Store
+Persisted AI transaction analyses, reused while their prompt template and model are current
+"""
+from dataclasses import fields
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+import logging
+
+from ..services.database import get_collection
+from ..services.friendli_ai_service import (
+    friendli_ai_service, TransactionAnalysis, TRANSACTION_PROMPT_VERSION, BATCH_PROMPT_VERSION
+)
+
+logger = logging.getLogger(__name__)
+
+_ANALYSIS_FIELDS = [f.name for f in fields(TransactionAnalysis)]
+
+class TransactionAnalysisStore:
+    """
+    Every analysis is recorded in ai_transaction_analysis with the prompt version and
+    model that produced it. Lookups only match records for the current versions, so
+    bumping a template version invalidates everything older without rewriting history.
+    Fallback and locally screened analyses are recorded without a version and never reused.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def current_versions(self) -> List[str]:
+        return [TRANSACTION_PROMPT_VERSION, BATCH_PROMPT_VERSION]
+
+    async def ensure_indexes(self):
+        collection = await get_collection("ai_transaction_analysis")
+        await collection.create_index([
+            ("transaction_hash", 1), ("prompt_version", 1), ("model", 1), ("created_at", -1)
+        ])
+
+    def _record(self, analysis: TransactionAnalysis, prompt_version: Optional[str],
+                created_at: datetime, tier: str) -> Dict[str, Any]:
+        reusable = prompt_version is not None and not analysis.fallback
+        return {
+            "transaction_hash": analysis.transaction_hash,
+            "analysis": {**analysis.__dict__, "tier": tier},
+            "prompt_version": prompt_version if reusable else None,
+            "model": friendli_ai_service.default_model,
+            "created_at": created_at,
+            "ai_service": "friendli_ai"
+        }
+
+    async def save(self, analysis: TransactionAnalysis, prompt_version: Optional[str], tier: str = "llm"):
+        try:
+            collection = await get_collection("ai_transaction_analysis")
+            await collection.insert_one(self._record(analysis, prompt_version, datetime.utcnow(), tier))
+        except Exception as e:
+            logger.error(f"Failed to store transaction analysis: {e}")
+
+    async def save_many(self, analyses: List[TransactionAnalysis], prompt_version: Optional[str],
+                        tier: str = "llm") -> int:
+        """Store batch analysis results in one round trip"""
+        if not analyses:
+            return 0
+        try:
+            collection = await get_collection("ai_transaction_analysis")
+            created_at = datetime.utcnow()
+            result = await collection.insert_many(
+                [self._record(analysis, prompt_version, created_at, tier) for analysis in analyses],
+                ordered=False
+            )
+            return len(result.inserted_ids)
+        except Exception as e:
+            logger.error(f"Failed to store batch transaction analyses: {e}")
+            return 0
+
+    async def get(self, transaction_hash: str) -> Optional[TransactionAnalysis]:
+        return (await self.get_many([transaction_hash])).get(transaction_hash)
+
+    async def get_many(self, transaction_hashes: List[str]) -> Dict[str, TransactionAnalysis]:
+        """Newest current-version analysis per hash, for the hashes that have one"""
+        found = {}
+        if transaction_hashes:
+            try:
+                collection = await get_collection("ai_transaction_analysis")
+                cursor = collection.find(
+                    {
+                        "transaction_hash": {"$in": list(set(transaction_hashes))},
+                        "prompt_version": {"$in": self.current_versions},
+                        "model": friendli_ai_service.default_model
+                    },
+                    {"_id": 0, "transaction_hash": 1, "analysis": 1}
+                ).sort("created_at", -1)
+                async for record in cursor:
+                    if record["transaction_hash"] not in found:
+                        stored = record["analysis"]
+                        found[record["transaction_hash"]] = TransactionAnalysis(
+                            **{name: stored[name] for name in _ANALYSIS_FIELDS if name in stored}
+                        )
+            except Exception as e:
+                logger.error(f"Failed to look up stored transaction analyses: {e}")
+
+        self.hits += len(found)
+        self.misses += len(set(transaction_hashes)) - len(found)
+        return found
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "current_versions": self.current_versions,
+            "model": friendli_ai_service.default_model
+        }
+
+# Global instance
+transaction_analysis_store = TransactionAnalysisStore()
@@ -1,7 +1,10 @@
 from typing import List, Dict
 from datetime import datetime, timedelta
 from ..models.wallet import HappyPaisaWallet, HappyPaisaTransaction, WalletTransaction, WalletBalance
+from pymongo import UpdateOne
+
 from .database import get_collection
+from .currency_units import hp_to_planck, planck_to_hp, planck_to_inr, record_planck, stored_planck, to_decimal128
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,13 +18,52 @@ class WalletService:
         
         wallet_data = await collection.find_one({"user_id": user_id})
         if wallet_data:
+            if "balance_planck" not in wallet_data:
+                wallet_data["balance_planck"] = await WalletService._migrate_float_balance(collection, wallet_data)
             return HappyPaisaWallet(**wallet_data)
         
         # Create new wallet
         new_wallet = HappyPaisaWallet(user_id=user_id)
-        await collection.insert_one(new_wallet.dict())
+        wallet_record = new_wallet.dict()
+        wallet_record["balance_planck"] = to_decimal128(new_wallet.balance_planck)
+        await collection.insert_one(wallet_record)
         return new_wallet
     
+    @staticmethod
+    async def _migrate_float_balance(collection, wallet_data: Dict) -> int:
+        """Convert a wallet written with float balance_hp to integer planck, once"""
+        balance_planck = hp_to_planck(wallet_data.get("balance_hp", 0.0))
+        result = await collection.update_one(
+            {"_id": wallet_data["_id"], "balance_planck": {"$exists": False}},
+            {
+                "$set": {"balance_planck": to_decimal128(balance_planck)},
+                "$unset": {"balance_hp": "", "balance_inr_equiv": ""}
+            }
+        )
+        if result.modified_count == 0:
+            # A concurrent request migrated (and possibly updated) it first
+            migrated = await collection.find_one({"_id": wallet_data["_id"]}, {"balance_planck": 1})
+            balance_planck = stored_planck(migrated["balance_planck"])
+        return balance_planck
+    
+    @staticmethod
+    async def migrate_float_balances() -> int:
+        """Convert every wallet still holding float balance_hp to integer planck (run on startup)"""
+        collection = await get_collection("wallets")
+        operations = []
+        async for wallet_data in collection.find({"balance_planck": {"$exists": False}}, {"balance_hp": 1}):
+            operations.append(UpdateOne(
+                {"_id": wallet_data["_id"], "balance_planck": {"$exists": False}},
+                {
+                    "$set": {"balance_planck": to_decimal128(hp_to_planck(wallet_data.get("balance_hp", 0.0)))},
+                    "$unset": {"balance_hp": "", "balance_inr_equiv": ""}
+                }
+            ))
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            logger.info(f"Migrated {len(operations)} wallets to integer planck balances")
+        return len(operations)
+    
     @staticmethod
     async def get_balance(user_id: str) -> WalletBalance:
         """Get wallet balance with recent transactions and spending breakdown"""
@@ -48,28 +90,30 @@ class WalletService:
         
         async for transaction in spending_cursor:
             category = transaction.get("category", "Other")
-            amount = transaction.get("amount_hp", 0)
-            spending_breakdown[category] = spending_breakdown.get(category, 0) + amount
+            spending_breakdown[category] = spending_breakdown.get(category, 0) + record_planck(transaction)
         
         return WalletBalance(
+            user_id=user_id,
             balance_hp=wallet.balance_hp,
             balance_inr_equiv=wallet.balance_inr_equiv,
+            balance_planck=wallet.balance_planck,
             recent_transactions=transaction_objects,
-            spending_breakdown=spending_breakdown
+            spending_breakdown={category: planck_to_hp(amount) for category, amount in spending_breakdown.items()}
         )
     
     @staticmethod
     async def add_transaction(transaction: WalletTransaction) -> HappyPaisaTransaction:
         """Add a new transaction and update wallet balance"""
-        # Calculate INR equivalent
-        amount_inr = transaction.amount_hp * 1000
+        # Amounts are fixed-point from here on; HP/INR are display copies
+        amount_planck = hp_to_planck(transaction.amount_hp)
         
         # Create transaction record
         new_transaction = HappyPaisaTransaction(
             user_id=transaction.user_id,
             type=transaction.type,
-            amount_hp=transaction.amount_hp,
-            amount_inr=amount_inr,
+            amount_hp=planck_to_hp(amount_planck),
+            amount_inr=planck_to_inr(amount_planck),
+            amount_planck=amount_planck,
             description=transaction.description,
             category=transaction.category,
             reference_id=transaction.reference_id
@@ -77,7 +121,9 @@ class WalletService:
         
         # Insert transaction
         transactions_collection = await get_collection("transactions")
-        await transactions_collection.insert_one(new_transaction.dict())
+        transaction_record = new_transaction.dict()
+        transaction_record["amount_planck"] = to_decimal128(amount_planck)
+        await transactions_collection.insert_one(transaction_record)
         
         # Update wallet balance
         await WalletService.update_balance(
@@ -133,18 +179,15 @@ class WalletService:
         """Update wallet balance based on transaction"""
         collection = await get_collection("wallets")
         
-        # Calculate change
-        balance_change = amount_hp if transaction_type == "credit" else -amount_hp
-        inr_change = balance_change * 1000
+        # Calculate change in planck so repeated $inc never accumulates float drift
+        amount_planck = hp_to_planck(amount_hp)
+        balance_change = amount_planck if transaction_type == "credit" else -amount_planck
         
         # Update wallet
         await collection.update_one(
             {"user_id": user_id},
             {
-                "$inc": {
-                    "balance_hp": balance_change,
-                    "balance_inr_equiv": inr_change
-                },
+                "$inc": {"balance_planck": to_decimal128(balance_change)},
                 "$set": {"updated_at": datetime.utcnow()}
             },
             upsert=True
@@ -156,7 +199,7 @@ class WalletService:
         try:
             # Check sender balance
             sender_wallet = await WalletService.get_or_create_wallet(from_user_id)
-            if sender_wallet.balance_hp < amount_hp:
+            if sender_wallet.balance_planck < hp_to_planck(amount_hp):
                 return False
             
             # Create debit transaction for sender
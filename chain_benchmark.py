@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Happy Paisa Chain Throughput Benchmark
+
+Drives HappyPaisaBlockchainGateway directly with a compressed block time and a
+mixed mint/burn/transfer workload across synthetic users, and emits the results
+as JSON so they can be tracked across commits.
+
+Usage:
+    python chain_benchmark.py                      # full gateway path (needs MongoDB)
+    python chain_benchmark.py --chain-only         # chain only, no database
+    python chain_benchmark.py --transactions 200000 --users 5000 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / "backend" / ".env")
+
+from backend.services.blockchain_gateway_service import HappyPaisaBlockchainGateway, TransactionType
+from backend.services.chain_event_service import BLOCKS_TOPIC
+from backend.services.currency_units import hp_to_planck
+
+SEED_BALANCE_HP = 1000.0
+OPERATIONS = ("mint", "burn", "transfer")
+
+def parse_mix(mix: str) -> dict:
+    """Parse 'mint:0.4,burn:0.2,transfer:0.4' into normalized weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, weight = part.split(":")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+def build_workload(count: int, users: list, mix: dict, seed: int) -> list:
+    """Pre-generate operations so workload generation isn't part of the measurement"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    workload = []
+    for op in rng.choices(names, weights, k=count):
+        amount = round(rng.uniform(0.001, 1.0), 6)
+        sender = rng.choice(users)
+        recipient = rng.choice(users)
+        while recipient == sender and len(users) > 1:
+            recipient = rng.choice(users)
+        workload.append((op, sender, recipient, amount))
+    return workload
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+class ChainBenchmark:
+    """Runs one workload against a fresh gateway and collects timings"""
+
+    def __init__(self, args):
+        self.args = args
+        self.gateway = HappyPaisaBlockchainGateway()
+        self.gateway.chain.block_time = args.block_time
+        self.gateway.chain.retention_blocks = args.retention_blocks
+        self.gateway.chain.mempool.block_capacity = args.block_capacity
+        if args.chain_only:
+            # Evicted transactions are simply dropped instead of written to MongoDB
+            self.gateway.chain.archive.persist = False
+        self.users = []
+        self.addresses = {}  # user_id -> address (chain-only mode)
+        self.submitted = []
+        self.submit_times = {}  # tx_hash -> submission timestamp, when tracking latency
+        self.track_latency = True
+        self.rejected = 0
+
+    async def setup(self):
+        """Create synthetic users and seed every one of them with balance in a single batch"""
+        self.users = [f"bench-user-{i}" for i in range(self.args.users)]
+
+        if self.args.chain_only:
+            self.addresses = {user_id: f"5{secrets.token_hex(24)}" for user_id in self.users}
+            calls = [
+                {"type": TransactionType.MINT, "from": self.gateway.chain.mint_authority,
+                 "to": address, "amount_planck": hp_to_planck(SEED_BALANCE_HP)}
+                for address in self.addresses.values()
+            ]
+            await self.gateway.chain.submit_batch_extrinsic(TransactionType.MINT, calls)
+        else:
+            await self.gateway.batch_mint_happy_paisa(
+                [{"user_id": user_id, "amount_hp": SEED_BALANCE_HP} for user_id in self.users],
+                reference_id="benchmark-seed"
+            )
+        await self.drain()
+
+    async def submit(self, op: str, sender: str, recipient: str, amount: float) -> str:
+        if not self.args.chain_only:
+            if op == "mint":
+                return await self.gateway.mint_happy_paisa(sender, amount)
+            if op == "burn":
+                return await self.gateway.burn_happy_paisa(sender, amount)
+            return await self.gateway.transfer_happy_paisa(sender, recipient, amount)
+
+        chain = self.gateway.chain
+        if op == "mint":
+            extrinsic = {"type": TransactionType.MINT, "from": chain.mint_authority, "to": self.addresses[sender]}
+        elif op == "burn":
+            extrinsic = {"type": TransactionType.BURN, "from": self.addresses[sender], "to": chain.treasury_address}
+        else:
+            extrinsic = {"type": TransactionType.TRANSFER, "from": self.addresses[sender], "to": self.addresses[recipient]}
+        extrinsic["amount_planck"] = hp_to_planck(amount)
+        return await chain.submit_extrinsic(extrinsic)
+
+    async def worker(self, queue: asyncio.Queue):
+        while True:
+            try:
+                operation = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                tx_hash = await self.submit(*operation)
+                self.submitted.append(tx_hash)
+                if self.track_latency:
+                    self.submit_times[tx_hash] = self.gateway.chain.transactions[tx_hash].timestamp
+            except ValueError:
+                self.rejected += 1
+            # Yield like an independent request would, so the block producer interleaves
+            await asyncio.sleep(0)
+
+    async def drain(self):
+        """Wait until every pending extrinsic has been included"""
+        await self.gateway.chain.wait_for_inclusion()
+
+    async def collect_blocks(self, subscription, confirm_times: dict):
+        """Record the sealing time of every extrinsic, since old blocks leave memory during the run"""
+        while True:
+            event = await subscription.get()
+            timestamp = datetime.fromisoformat(event.data["timestamp"])
+            for tx_hash in event.data["extrinsics"]:
+                confirm_times[tx_hash] = timestamp
+
+    async def run(self, workload: list) -> dict:
+        queue = asyncio.Queue()
+        for operation in workload:
+            queue.put_nowait(operation)
+
+        chain = self.gateway.chain
+        confirm_times = {}
+        collector = None
+        if self.track_latency:
+            chain.events.queue_size = len(workload) + 1  # never drop block events
+            subscription = chain.events.subscribe([BLOCKS_TOPIC])
+            collector = asyncio.create_task(self.collect_blocks(subscription, confirm_times))
+
+        blocks_before = chain.current_block
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker(queue) for _ in range(self.args.concurrency)))
+        submit_elapsed = time.perf_counter() - start
+        await self.drain()
+        total_elapsed = time.perf_counter() - start
+
+        if collector is not None:
+            # Let the collector consume the final block's event before stopping it
+            while not subscription.queue.empty():
+                await asyncio.sleep(0)
+            collector.cancel()
+            chain.events.unsubscribe(subscription)
+
+        latencies_ms = []
+        confirmed = failed = 0
+        for tx_hash in self.submitted:
+            if self.track_latency:
+                confirmed_at = confirm_times.get(tx_hash)
+                if confirmed_at is None:
+                    failed += 1
+                    continue
+                latencies_ms.append((confirmed_at - self.submit_times[tx_hash]).total_seconds() * 1000)
+            confirmed += 1
+        latencies_ms.sort()
+
+        return {
+            "submitted": len(self.submitted),
+            "rejected_at_submission": self.rejected,
+            "confirmed": confirmed,
+            "failed_at_inclusion": failed,
+            "blocks_produced": chain.current_block - blocks_before,
+            "submit_seconds": round(submit_elapsed, 4),
+            "total_seconds": round(total_elapsed, 4),
+            "submissions_per_second": round(len(self.submitted) / submit_elapsed, 2) if submit_elapsed else 0.0,
+            "confirmations_per_second": round(confirmed / total_elapsed, 2) if total_elapsed else 0.0,
+            "mempool_lanes": chain.mempool.get_stats()["lanes"],
+            "submit_to_confirm_latency_ms": {
+                "p50": round(percentile(latencies_ms, 50), 3),
+                "p95": round(percentile(latencies_ms, 95), 3),
+                "p99": round(percentile(latencies_ms, 99), 3),
+                "max": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+                "mean": round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0
+            }
+        }
+
+async def measure_memory(args, workload: list) -> dict:
+    """Separate chain-only pass under tracemalloc, so tracing doesn't skew throughput"""
+    memory_args = argparse.Namespace(**{**vars(args), "chain_only": True})
+    benchmark = ChainBenchmark(memory_args)
+    benchmark.track_latency = False
+    await benchmark.setup()
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    await benchmark.run(workload)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    transactions = max(len(benchmark.submitted), 1)
+    bytes_per_tx = (current - baseline) / transactions
+    retention = benchmark.gateway.chain.get_retention_stats()
+    return {
+        "measured_transactions": len(benchmark.submitted),
+        "retained_transactions": retention["retained_transactions"],
+        "estimated_bytes_per_retained_transaction": retention["estimated_bytes_per_transaction"],
+        "bytes_per_transaction": round(bytes_per_tx, 1),
+        "mb_per_million_transactions": round(bytes_per_tx * 1_000_000 / (1024 * 1024), 1),
+        "peak_traced_mb": round(peak / (1024 * 1024), 1)
+    }
+
+async def main(args):
+    if not args.chain_only:
+        # Keep benchmark data out of the application database
+        os.environ["DB_NAME"] = args.db_name
+
+    mix = parse_mix(args.mix)
+    benchmark = ChainBenchmark(args)
+    await benchmark.setup()
+    workload = build_workload(args.transactions, benchmark.users, mix, args.seed)
+
+    report = {
+        "benchmark": "happy_paisa_chain_throughput",
+        "commit": git_commit(),
+        "run_at": datetime.utcnow().isoformat(),
+        "config": {
+            "mode": "chain_only" if args.chain_only else "gateway",
+            "transactions": args.transactions,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "block_time_seconds": args.block_time,
+            "retention_blocks": args.retention_blocks,
+            "block_capacity": args.block_capacity,
+            "mix": mix,
+            "seed": args.seed
+        },
+        "throughput": await benchmark.run(workload)
+    }
+
+    if not args.skip_memory:
+        memory_workload = workload[:args.memory_transactions]
+        report["memory"] = await measure_memory(args, memory_workload)
+
+    if not args.chain_only:
+        from backend.services.database import get_database, close_database
+        database = await get_database()
+        await database.client.drop_database(args.db_name)
+        await close_database()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Happy Paisa chain throughput benchmark")
+    parser.add_argument("--transactions", type=int, default=50000, help="Number of operations to submit")
+    parser.add_argument("--users", type=int, default=1000, help="Number of synthetic users")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent submitters")
+    parser.add_argument("--block-time", type=float, default=0.0, help="Block time in seconds (0 = as fast as possible)")
+    parser.add_argument("--block-capacity", type=int, default=2000, help="Maximum extrinsic weight per block")
+    parser.add_argument("--retention-blocks", type=int, default=1000, help="Blocks whose transactions stay in memory")
+    parser.add_argument("--mix", default="mint:0.3,burn:0.2,transfer:0.5", help="Operation weights")
+    parser.add_argument("--seed", type=int, default=42, help="Workload random seed")
+    parser.add_argument("--chain-only", action="store_true", help="Bypass MongoDB and drive the chain directly")
+    parser.add_argument("--db-name", default="axzora_chain_benchmark", help="Scratch database for gateway mode")
+    parser.add_argument("--memory-transactions", type=int, default=20000, help="Operations in the memory pass")
+    parser.add_argument("--skip-memory", action="store_true", help="Skip the tracemalloc memory pass")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Mock Upstream Services for Offline Load Testing
+
+One local app standing in for every outbound integration of the Axzora backend:
+Friendli AI (chat completions, including SSE streaming), Amadeus (OAuth, flight,
+hotel and city search), n8n webhooks and the GA4 Measurement Protocol.
+
+Each service has its own latency distribution and error rate, seeded so runs are
+reproducible. Point the backend at it with:
+
+    FRIENDLI_BASE_URL=http://localhost:8099
+    AMADEUS_BASE_URL=http://localhost:8099
+    N8N_BASE_URL=http://localhost:8099
+    GA4_ENDPOINT=http://localhost:8099/mp/collect   (plus non-demo GA_MEASUREMENT_ID/GA_API_SECRET)
+
+Per-service settings (SERVICE is FRIENDLI, AMADEUS, N8N or GA4):
+
+    MOCK_<SERVICE>_LATENCY        fixed | uniform | lognormal (default lognormal)
+    MOCK_<SERVICE>_MEDIAN_MS      median latency (uniform: midpoint)
+    MOCK_<SERVICE>_P99_MS         99th percentile latency (uniform: upper bound)
+    MOCK_<SERVICE>_ERROR_RATE     fraction of requests answered with an error
+    MOCK_<SERVICE>_ERROR_STATUS   status code used for errors (default 500; 429 adds Retry-After)
+    MOCK_SEED                     random seed (default 42)
+    MOCK_PORT                     listen port (default 8099)
+
+Profiles can also be changed at runtime with POST /_mock/profiles/{service}, and
+GET /_mock/stats reports request, error and latency counts per service.
+"""
+
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pathlib import Path
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import uvicorn
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+
+# z-score of the 99th percentile of a standard normal distribution
+Z_P99 = 2.326
+
+class LatencyProfile:
+    """Latency distribution and error injection for one mocked upstream"""
+
+    def __init__(self, distribution: str = "lognormal", median_ms: float = 100.0, p99_ms: float = 400.0,
+                 error_rate: float = 0.0, error_status: int = 500):
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.p99_ms = max(p99_ms, median_ms)
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    @classmethod
+    def from_env(cls, service: str, **defaults) -> "LatencyProfile":
+        prefix = f"MOCK_{service.upper()}_"
+        profile = cls(**defaults)
+        return cls(
+            distribution=os.getenv(prefix + "LATENCY", profile.distribution),
+            median_ms=float(os.getenv(prefix + "MEDIAN_MS", profile.median_ms)),
+            p99_ms=float(os.getenv(prefix + "P99_MS", profile.p99_ms)),
+            error_rate=float(os.getenv(prefix + "ERROR_RATE", profile.error_rate)),
+            error_status=int(os.getenv(prefix + "ERROR_STATUS", profile.error_status))
+        )
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            ms = self.median_ms
+        elif self.distribution == "uniform":
+            ms = rng.uniform(max(0.0, 2 * self.median_ms - self.p99_ms), self.p99_ms)
+        else:
+            sigma = math.log(self.p99_ms / self.median_ms) / Z_P99 if self.median_ms > 0 else 0.0
+            ms = self.median_ms * math.exp(rng.gauss(0.0, sigma)) if self.median_ms > 0 else 0.0
+        return ms / 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "distribution": self.distribution,
+            "median_ms": self.median_ms,
+            "p99_ms": self.p99_ms,
+            "error_rate": self.error_rate,
+            "error_status": self.error_status
+        }
+
+class ServiceStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=100000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 2) if latencies else 0.0
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99)
+        }
+
+rng = random.Random(int(os.getenv("MOCK_SEED", "42")))
+
+profiles = {
+    "friendli": LatencyProfile.from_env("friendli", median_ms=600, p99_ms=2500),
+    "amadeus": LatencyProfile.from_env("amadeus", median_ms=900, p99_ms=3000),
+    "n8n": LatencyProfile.from_env("n8n", median_ms=150, p99_ms=800),
+    "ga4": LatencyProfile.from_env("ga4", median_ms=40, p99_ms=150)
+}
+stats = {service: ServiceStats() for service in profiles}
+
+async def simulate(service: str) -> Optional[int]:
+    """Sleep for a sampled latency; returns an error status if this request should fail"""
+    profile = profiles[service]
+    delay = profile.sample_seconds(rng)
+    failed = rng.random() < profile.error_rate
+    await asyncio.sleep(delay)
+    stats[service].requests += 1
+    stats[service].latencies_ms.append(delay * 1000)
+    if failed:
+        stats[service].errors += 1
+        return profile.error_status
+    return None
+
+def error_headers(status: int) -> Dict[str, str]:
+    return {"Retry-After": "1"} if status == 429 else {}
+
+app = FastAPI(title="Mock Upstream Services", version="1.0.0")
+
+@app.get("/")
+async def root():
+    return {
+        "message": "Mock upstream services running",
+        "status": "healthy",
+        "services": list(profiles),
+        "profiles": {service: profile.to_dict() for service, profile in profiles.items()}
+    }
+
+@app.get("/_mock/stats")
+async def get_mock_stats():
+    return {service: service_stats.to_dict() for service, service_stats in stats.items()}
+
+@app.post("/_mock/profiles/{service}")
+async def update_profile(service: str, request: Request):
+    """Change a service's latency profile, e.g. {"median_ms": 200, "error_rate": 0.05}"""
+    if service not in profiles:
+        return JSONResponse(content={"error": f"Unknown service: {service}"}, status_code=404)
+    try:
+        updates = await request.json()
+    except ValueError:
+        updates = None
+    error = _profile_update_error(updates)
+    if error:
+        return JSONResponse(content={"error": error}, status_code=422)
+    profiles[service] = LatencyProfile(**{**profiles[service].to_dict(), **updates})
+    return profiles[service].to_dict()
+
+def _profile_update_error(updates: Any) -> Optional[str]:
+    """Why a profile update is invalid, or None"""
+    if not isinstance(updates, dict):
+        return "Body must be a JSON object"
+    unknown = sorted(set(updates) - set(LatencyProfile().to_dict()))
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}"
+    if "distribution" in updates and updates["distribution"] not in ("lognormal", "uniform", "fixed"):
+        return "distribution must be lognormal, uniform or fixed"
+    for name in ("median_ms", "p99_ms", "error_rate"):
+        value = updates.get(name, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            return f"{name} must be a non-negative number"
+    if updates.get("error_rate", 0) > 1:
+        return "error_rate must be between 0 and 1"
+    status = updates.get("error_status", 500)
+    if isinstance(status, bool) or not isinstance(status, int) or not 400 <= status <= 599:
+        return "error_status must be an HTTP error status (400-599)"
+    return None
+
+@app.post("/_mock/reset")
+async def reset_stats():
+    for service in stats:
+        stats[service] = ServiceStats()
+    return {"status": "reset"}
+
+# Friendli AI
+
+CANNED_COMPLETIONS = {
+    "transaction_risk": {
+        "risk_level": "low", "risk_score": 18, "anomaly_detected": False,
+        "insights": ["Amount is in line with the wallet's history"],
+        "recommendations": ["No action needed"], "fraud_indicators": [],
+        "summary": "Routine transaction with no risk signals"
+    },
+    "wallet_insights": {
+        "spending_patterns": ["Most spending goes to travel and recharges"],
+        "financial_health_score": 78,
+        "recommendations": ["Set a monthly travel budget"],
+        "trends": ["Spending is stable week over week"],
+        "optimization_tips": ["Batch small recharges"],
+        "summary": "Healthy wallet with steady spending"
+    },
+    "fraud_patterns": {
+        "alert_level": "none", "unusual_patterns": [], "fraud_indicators": [],
+        "recommendations": ["Keep monitoring"], "summary": "No suspicious activity found"
+    }
+}
+CANNED_CHAT_REPLY = os.getenv(
+    "MOCK_FRIENDLI_REPLY",
+    "Hello! Your Happy Paisa wallet looks healthy. Risk Score: 20. Health score: 80."
+)
+BATCH_INDEX_PATTERN = re.compile(r"^\s*(\d+)\|", re.MULTILINE)
+
+def canned_completion(payload: Dict[str, Any]) -> str:
+    """JSON matching the requested response schema, or a plain chat reply"""
+    schema_name = (payload.get("response_format") or {}).get("json_schema", {}).get("name")
+    if schema_name == "transaction_risk_batch":
+        prompt = payload["messages"][-1]["content"]
+        indices = [int(index) for index in BATCH_INDEX_PATTERN.findall(prompt)]
+        return json.dumps({"results": [{**CANNED_COMPLETIONS["transaction_risk"], "index": index} for index in indices]})
+    if schema_name in CANNED_COMPLETIONS:
+        return json.dumps(CANNED_COMPLETIONS[schema_name])
+    return CANNED_CHAT_REPLY
+
+def completion_usage(payload: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(message.get("content", "")) // 4 for message in payload.get("messages", []))
+    completion_tokens = len(content) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    error = await simulate("friendli")
+    if error:
+        return JSONResponse(content={"message": "Mock upstream error"}, status_code=error,
+                            headers=error_headers(error))
+
+    content = canned_completion(payload)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = payload.get("model", "mock-model")
+
+    if payload.get("stream"):
+        async def events():
+            for piece in re.findall(r"\S+\s*", content):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.01)
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": completion_usage(payload, content)
+    }
+
+# Amadeus
+
+def load_canned(filename: str) -> Dict[str, Any]:
+    with open(ROOT_DIR / filename) as f:
+        return json.load(f)
+
+def raw_flight_offer(flight: Dict[str, Any]) -> Dict[str, Any]:
+    """Amadeus flight-offers shape rebuilt from a processed flight in the canned response"""
+    price = flight["price"]
+    segments = [{
+        "departure": {"iataCode": segment["departure"]["airport"], "terminal": segment["departure"]["terminal"],
+                      "at": segment["departure"]["time"]},
+        "arrival": {"iataCode": segment["arrival"]["airport"], "terminal": segment["arrival"]["terminal"],
+                    "at": segment["arrival"]["time"]},
+        "carrierCode": segment["carrier"],
+        "number": segment["flight_number"],
+        "aircraft": {"code": segment["aircraft"]},
+        "duration": segment["duration"],
+        "cabin": segment["cabin_class"]
+    } for segment in flight["itineraries"]]
+    return {
+        "type": "flight-offer",
+        "id": flight["id"],
+        "lastTicketingDate": flight.get("last_ticketing_date"),
+        "itineraries": [{"duration": flight["duration"], "segments": segments}],
+        "price": {
+            "currency": price["currency"],
+            "total": str(price["total_price"]),
+            "base": str(price["base_price"]),
+            "fees": [{"type": fee["type"], "amount": str(fee["amount"])} for fee in price["fees"]]
+        },
+        "travelerPricings": flight.get("traveler_pricings", [])
+    }
+
+def raw_hotel_offer(hotel_offer: Dict[str, Any]) -> Dict[str, Any]:
+    """Amadeus hotel-offers shape rebuilt from a processed hotel in the canned response"""
+    hotel = hotel_offer["hotel"]
+    return {
+        "type": "hotel-offers",
+        "id": hotel_offer["id"],
+        "hotel": {
+            "name": hotel["name"], "hotelId": hotel["hotel_id"], "chainCode": hotel["chain_code"],
+            "iataCode": hotel["iata_code"], "address": hotel["address"], "contact": hotel["contact"],
+            "description": hotel["description"]
+        },
+        "offers": [{
+            "id": offer["id"],
+            "price": {
+                "currency": offer["price"]["currency"], "total": str(offer["price"]["total"]),
+                "base": str(offer["price"]["base"]), "taxes": offer["price"]["taxes"],
+                "variations": offer["price"]["variations"]
+            },
+            "room": {"type": offer["room"]["type"], "typeEstimated": offer["room"]["type_estimated"],
+                     "description": offer["room"]["description"]},
+            "guests": offer["guests"],
+            "policies": offer["policies"]
+        } for offer in hotel_offer["offers"]]
+    }
+
+FLIGHT_OFFERS = [raw_flight_offer(flight) for flight in load_canned("amadeus_flight_search_response.json")["flights"]]
+HOTEL_OFFERS = [raw_hotel_offer(hotel) for hotel in load_canned("amadeus_hotel_search_response.json")["hotels"]]
+CITIES = [
+    {"type": "location", "subType": "city", "name": "Mumbai", "iataCode": "BOM",
+     "address": {"countryCode": "IN"}, "geoCode": {"latitude": 19.07, "longitude": 72.87}},
+    {"type": "location", "subType": "city", "name": "Goa", "iataCode": "GOI",
+     "address": {"countryCode": "IN"}, "geoCode": {"latitude": 15.49, "longitude": 73.82}},
+    {"type": "location", "subType": "city", "name": "Dubai", "iataCode": "DXB",
+     "address": {"countryCode": "AE"}, "geoCode": {"latitude": 25.2, "longitude": 55.27}}
+]
+
+def amadeus_error(status: int) -> JSONResponse:
+    title = "Too many requests" if status == 429 else "SYSTEM ERROR HAS OCCURRED"
+    code = 38194 if status == 429 else 141
+    return JSONResponse(content={"errors": [{"status": status, "code": code, "title": title}]},
+                        status_code=status, headers=error_headers(status))
+
+def amadeus_data(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"meta": {"count": len(data)}, "data": data}
+
+@app.post("/v1/security/oauth2/token")
+async def amadeus_token():
+    error = await simulate("amadeus")
+    if error:
+        return amadeus_error(error)
+    return {
+        "type": "amadeusOAuth2Token",
+        "username": "mock@axzora.com",
+        "application_name": "axzora-mock",
+        "client_id": "mock-client",
+        "token_type": "Bearer",
+        "access_token": uuid.uuid4().hex,
+        "expires_in": 1799,
+        "state": "approved",
+        "scope": ""
+    }
+
+@app.get("/v2/shopping/flight-offers")
+async def amadeus_flight_offers(max_results: int = Query(10, alias="max")):
+    error = await simulate("amadeus")
+    return amadeus_error(error) if error else amadeus_data(FLIGHT_OFFERS[:max_results])
+
+@app.get("/v3/shopping/hotel-offers")
+async def amadeus_hotel_offers():
+    error = await simulate("amadeus")
+    return amadeus_error(error) if error else amadeus_data(HOTEL_OFFERS)
+
+@app.get("/v1/reference-data/locations/cities")
+async def amadeus_cities(keyword: str = "", max_results: int = Query(10, alias="max")):
+    error = await simulate("amadeus")
+    if error:
+        return amadeus_error(error)
+    matches = [city for city in CITIES if keyword.lower() in city["name"].lower()] or CITIES
+    return amadeus_data(matches[:max_results])
+
+# n8n
+
+webhook_history = []
+
+N8N_WORKFLOWS = {
+    "axzora-messaging": ("messaging", "messaging_workflow_001"),
+    "axzora-ai-processing": ("ai_processing", "ai_processing_workflow_002"),
+    "axzora-data-sync": ("data_sync", "data_sync_workflow_003"),
+    "axzora-backup": ("backup", "backup_workflow_004")
+}
+
+def n8n_result(workflow_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    if workflow_type == "messaging":
+        return {
+            "notification_type": payload.get("event", {}).get("data", {}).get("notification_type", "telegram"),
+            "message_id": f"msg_{int(now.timestamp())}",
+            "delivery_status": "delivered",
+            "user_id": payload.get("user", {}).get("id", "unknown")
+        }
+    if workflow_type == "ai_processing":
+        return {
+            "user_id": payload.get("user_id"),
+            "insights": {"spending_category": "Shopping", "recommendation_score": 8.5},
+            "recommendations": ["Consider setting up automatic savings for small purchases"],
+            "analysis_type": payload.get("analysis_type", "spending_insights"),
+            "confidence_score": 0.92,
+            "processed_at": now.isoformat()
+        }
+    if workflow_type == "data_sync":
+        return {
+            "sync_type": payload.get("sync_type", "incremental"),
+            "records_processed": 157,
+            "destination": payload.get("destination", "postgresql"),
+            "last_sync": now.isoformat()
+        }
+    return {
+        "backup_type": payload.get("backup_type", "full"),
+        "destination": payload.get("destination", "google_drive"),
+        "backup_size": 1024 * 1024 * 12,
+        "file_count": 245,
+        "completion_time": now.isoformat()
+    }
+
+@app.get("/healthz")
+async def n8n_health():
+    error = await simulate("n8n")
+    if error:
+        return JSONResponse(content={"status": "error"}, status_code=error)
+    return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+
+@app.get("/webhook/history")
+async def get_webhook_history():
+    """Get history of received webhooks for debugging"""
+    return {
+        "total_webhooks": len(webhook_history),
+        "webhooks": webhook_history[-10:],
+        "summary": {
+            workflow_type: len([w for w in webhook_history if w["type"] == workflow_type])
+            for workflow_type, _ in N8N_WORKFLOWS.values()
+        }
+    }
+
+@app.post("/webhook/{webhook_path}")
+async def n8n_webhook(webhook_path: str, request: Request):
+    if webhook_path not in N8N_WORKFLOWS:
+        return JSONResponse(content={"message": f"Webhook {webhook_path} is not registered"}, status_code=404)
+    payload = await request.json()
+    error = await simulate("n8n")
+    if error:
+        return JSONResponse(content={"message": "Workflow execution failed"}, status_code=error)
+
+    workflow_type, workflow_id = N8N_WORKFLOWS[webhook_path]
+    webhook_history.append({
+        "type": workflow_type,
+        "payload": payload,
+        "timestamp": datetime.utcnow().isoformat(),
+        "status": "processed"
+    })
+    del webhook_history[:-1000]
+    return {
+        "status": "success",
+        "workflow_id": workflow_id,
+        "execution_id": f"exec_{uuid.uuid4().hex[:12]}",
+        "data": n8n_result(workflow_type, payload)
+    }
+
+# GA4 Measurement Protocol
+
+@app.post("/mp/collect")
+async def ga4_collect():
+    error = await simulate("ga4")
+    return Response(status_code=error or 204)
+
+@app.post("/debug/mp/collect")
+async def ga4_debug_collect():
+    error = await simulate("ga4")
+    if error:
+        return Response(status_code=error)
+    return {"validationMessages": []}
+
+if __name__ == "__main__":
+    port = int(os.getenv("MOCK_PORT", "8099"))
+    print("🚀 Starting mock upstream services for offline load testing...")
+    print(f"🔗 Point FRIENDLI_BASE_URL, AMADEUS_BASE_URL and N8N_BASE_URL at http://localhost:{port}")
+    print(f"📊 Per-service stats at http://localhost:{port}/_mock/stats")
+    print("")
+
+    uvicorn.run(app, host="0.0.0.0", port=port, log_level="warning")